@@ -0,0 +1,107 @@
+import argparse
+import datetime
+import json
+import pathlib
+import platform
+import subprocess
+import sys
+
+from tdp.ecs.assets import load_assets
+from tdp.ecs.statsrepo import load_stats_repo
+
+from tdp.ecs.replay import load_replay
+
+from .suite import SCENARIOS, compare_results, run_replays, run_suite
+
+
+def current_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Times headless games on the real maps, no display needed",
+    )
+    parser.add_argument("--ticks", type=int, default=3000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=[scenario.name for scenario in SCENARIOS],
+        help="may be given more than once, defaults to all",
+    )
+    parser.add_argument(
+        "--replay",
+        action="append",
+        type=pathlib.Path,
+        default=[],
+        help="recorded games to time as well, may be given more than once",
+    )
+    parser.add_argument("--output", type=pathlib.Path)
+    parser.add_argument(
+        "--compare", type=pathlib.Path, help="results of an earlier run to compare to"
+    )
+
+    args = parser.parse_args()
+
+    scenarios = [
+        scenario
+        for scenario in SCENARIOS
+        if not args.scenario or scenario.name in args.scenario
+    ]
+
+    assets = load_assets()
+    stats_repo = load_stats_repo()
+
+    results = {
+        "commit": current_commit(),
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "ticks": args.ticks,
+        "repeat": args.repeat,
+        "scenarios": run_suite(
+            scenarios,
+            ticks=args.ticks,
+            repeat=args.repeat,
+            assets=assets,
+            stats_repo=stats_repo,
+        ),
+    }
+
+    # played back in full, --ticks does not apply
+    results["scenarios"].update(
+        run_replays(
+            {f"replay-{path.name}": load_replay(path) for path in args.replay},
+            repeat=args.repeat,
+            assets=assets,
+            stats_repo=stats_repo,
+        )
+    )
+
+    for name, result in results["scenarios"].items():
+        print(
+            f"{name}: {result['ticks_per_sec']:.1f} ticks/s over {result['ticks']}"
+            f" ticks, peak {result['peak_entities']} entities"
+        )
+
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(results, indent=2))
+
+    if args.compare is not None:
+        print()
+        print("\n".join(compare_results(json.loads(args.compare.read_text()), results)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
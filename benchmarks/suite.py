@@ -0,0 +1,253 @@
+import dataclasses
+import logging
+import time
+
+from tdp.ecs.assets import Assets
+from tdp.ecs.components import ScoreTracker, Spawning
+from tdp.ecs.enums import TurretKind, enabled_turret_kinds
+from tdp.ecs.headless import HeadlessGame, build_headless_game, place_turrets
+from tdp.ecs.profiling import Profiler, percentile
+from tdp.ecs.replay import Replay, play_replay_headless
+from tdp.ecs.statsrepo import StatsRepo
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass
+class Scenario:
+    name: str
+    map_name: str
+
+    # cycled over the map's build zones, in map order; empty leaves them be
+    turret_layout: tuple[TurretKind, ...] = ()
+
+    # skip ahead to busier waves
+    start_wave_index: int = 0
+
+    seed: int = 0
+
+
+# map2 has no Base/Environment/Objects layers or path, so it can't be
+# loaded as a game map and has no scenarios
+SCENARIOS = [
+    Scenario(name="tutorial-empty", map_name="tutorial"),
+    Scenario(
+        name="tutorial-mixed",
+        map_name="tutorial",
+        turret_layout=tuple(enabled_turret_kinds),
+    ),
+    Scenario(name="winding-empty", map_name="winding"),
+    Scenario(
+        name="winding-bullet",
+        map_name="winding",
+        turret_layout=(TurretKind.Bullet,),
+    ),
+    Scenario(
+        name="winding-mixed",
+        map_name="winding",
+        turret_layout=tuple(enabled_turret_kinds),
+    ),
+    Scenario(
+        name="winding-mixed-late",
+        map_name="winding",
+        turret_layout=tuple(enabled_turret_kinds),
+        start_wave_index=21,
+    ),
+]
+
+
+def build_scenario_game(
+    scenario: Scenario, *, assets: Assets, stats_repo: StatsRepo, profiler: Profiler
+) -> HeadlessGame:
+    game = build_headless_game(
+        scenario.map_name,
+        seed=scenario.seed,
+        assets=assets,
+        stats_repo=stats_repo,
+        profiler=profiler,
+    )
+
+    place_turrets(game, scenario.turret_layout)
+
+    spawning = game.world.get_component(Spawning)[0][1]
+    spawning.current_wave_index = scenario.start_wave_index
+
+    return game
+
+
+def run_scenario(
+    scenario: Scenario, *, ticks: int, assets: Assets, stats_repo: StatsRepo
+) -> dict:
+    """
+    Runs up to `ticks` logic ticks, or until game over, and reports the
+    throughput, per-processor times and peak entity counts
+    """
+    profiler = Profiler(window=ticks)
+
+    game = build_scenario_game(
+        scenario, assets=assets, stats_repo=stats_repo, profiler=profiler
+    )
+
+    start = time.perf_counter()
+
+    while game.ticks < ticks and not game.game_over:
+        game.tick()
+
+    seconds = time.perf_counter() - start
+
+    logger.info("Ran scenario %s for %d ticks", scenario.name, game.ticks)
+
+    return summarize_game(game, map_name=scenario.map_name, seconds=seconds)
+
+
+def run_replay(replay: Replay, *, assets: Assets, stats_repo: StatsRepo) -> dict:
+    """
+    Same report as a scenario, over every tick of a recorded game
+    """
+    profiler = Profiler(window=replay.ticks)
+
+    start = time.perf_counter()
+
+    game = play_replay_headless(
+        replay, assets=assets, stats_repo=stats_repo, profiler=profiler
+    )
+
+    seconds = time.perf_counter() - start
+
+    return summarize_game(game, map_name=replay.map_name, seconds=seconds)
+
+
+def summarize_game(game: HeadlessGame, *, map_name: str, seconds: float) -> dict:
+    profiler = game.profiler
+
+    processor_samples: dict[str, list[int]] = {}
+
+    for frame in profiler.frames:
+        for name, process_time in frame["processors"].items():
+            processor_samples.setdefault(name, []).append(process_time)
+
+    peak_components: dict[str, int] = {}
+
+    for frame in profiler.frames:
+        for name, count in frame["components"].items():
+            peak_components[name] = max(peak_components.get(name, 0), count)
+
+    score_tracker = game.world.get_component(ScoreTracker)[0][1]
+    spawning = game.world.get_component(Spawning)[0][1]
+
+    return {
+        "map": map_name,
+        "ticks": game.ticks,
+        "game_over": game.game_over,
+        "seconds": seconds,
+        "ticks_per_sec": game.ticks / seconds if seconds else 0.0,
+        "peak_entities": max(
+            (frame["entities"] for frame in profiler.frames), default=0
+        ),
+        "peak_components": dict(sorted(peak_components.items())),
+        "processors_ms": {
+            name: {
+                "total": sum(samples) / 1_000_000.0,
+                **{
+                    f"p{p}": percentile(sorted(samples), p) / 1_000_000.0
+                    for p in (50, 95, 99)
+                },
+            }
+            for name, samples in sorted(processor_samples.items())
+        },
+        # same seed and ticks should always reach the same state
+        "final_wave": spawning.current_wave_num,
+        "score": {kind.name: value for kind, value in score_tracker.scores.items()},
+    }
+
+
+def run_suite(
+    scenarios: list[Scenario],
+    *,
+    ticks: int,
+    repeat: int,
+    assets: Assets,
+    stats_repo: StatsRepo,
+) -> dict[str, dict]:
+    results = {}
+
+    for scenario in scenarios:
+        # fastest run is the least disturbed by whatever else the machine is
+        # doing
+        results[scenario.name] = min(
+            (
+                run_scenario(
+                    scenario, ticks=ticks, assets=assets, stats_repo=stats_repo
+                )
+                for _ in range(repeat)
+            ),
+            key=lambda result: result["seconds"],
+        )
+
+    return results
+
+
+def run_replays(
+    replays: dict[str, Replay],
+    *,
+    repeat: int,
+    assets: Assets,
+    stats_repo: StatsRepo,
+) -> dict[str, dict]:
+    return {
+        name: min(
+            (
+                run_replay(replay, assets=assets, stats_repo=stats_repo)
+                for _ in range(repeat)
+            ),
+            key=lambda result: result["seconds"],
+        )
+        for name, replay in replays.items()
+    }
+
+
+def compare_results(baseline: dict, current: dict) -> list[str]:
+    """
+    Lines comparing ticks/sec per scenario, and the processors whose total
+    time changed the most
+    """
+    lines = []
+
+    for name, result in current["scenarios"].items():
+        baseline_result = baseline["scenarios"].get(name)
+
+        if baseline_result is None:
+            lines.append(f"{name}: {result['ticks_per_sec']:.1f} ticks/s (new)")
+            continue
+
+        change = result["ticks_per_sec"] / baseline_result["ticks_per_sec"] - 1.0
+
+        lines.append(
+            f"{name}: {baseline_result['ticks_per_sec']:.1f} -> "
+            f"{result['ticks_per_sec']:.1f} ticks/s ({change:+.1%})"
+        )
+
+        if result["ticks"] != baseline_result["ticks"] or (
+            result["score"] != baseline_result["score"]
+        ):
+            lines.append("  simulation diverged from baseline")
+
+        processor_changes = sorted(
+            (
+                (
+                    processor_result["total"]
+                    - baseline_result["processors_ms"]
+                    .get(processor_name, {})
+                    .get("total", 0.0),
+                    processor_name,
+                )
+                for processor_name, processor_result in result["processors_ms"].items()
+            ),
+            key=lambda item: abs(item[0]),
+            reverse=True,
+        )
+
+        for difference, processor_name in processor_changes[:3]:
+            lines.append(f"  {processor_name}: {difference:+.1f} ms")
+
+    return lines
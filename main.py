@@ -1,15 +1,64 @@
+import argparse
 import logging
+import pathlib
 import sys
+import time
 
+from tdp.ecs.enums import GameSpeed
+from tdp.ecs.replay import load_replay, play_replay_headless
 from tdp.scene_manager import start_app
+from tdp.scenes.enums import SceneKind
 
 
 logging.basicConfig(stream=sys.stdout, level=logging.DEBUG)
 
 
-if __name__ == "__main__":
+def main():
+    parser = argparse.ArgumentParser()
     # dev shortcut for jumping straight to game
-    if len(sys.argv) > 2:
-        start_app(sys.argv[1], sys.argv[2])
-    else:
-        start_app()
+    parser.add_argument("scene", nargs="?", default=SceneKind.Main)
+    parser.add_argument("map", nargs="?", default="map1")
+    # profile processors, with an overlay in game and a dump on exit
+    parser.add_argument("--profile", action="store_true")
+    parser.add_argument("--replay", type=pathlib.Path)
+    # continue a saved game, quicksaves are under saves/
+    parser.add_argument("--load", type=pathlib.Path)
+    parser.add_argument(
+        "--speed",
+        choices=[game_speed.name for game_speed in GameSpeed],
+        default=GameSpeed.Normal.name,
+    )
+    # re-simulate the replay without a display, as fast as possible
+    parser.add_argument("--headless", action="store_true")
+
+    args = parser.parse_args()
+
+    if args.load is not None:
+        start_app(SceneKind.Game, profile=args.profile, snapshot_path=args.load)
+        return
+
+    if args.replay is None:
+        start_app(args.scene, args.map, profile=args.profile)
+        return
+
+    replay = load_replay(args.replay)
+
+    if args.headless:
+        start = time.perf_counter()
+        game = play_replay_headless(replay)
+        seconds = time.perf_counter() - start
+
+        print(f"Replayed {game.ticks} ticks in {seconds:.2f}s")
+        return
+
+    start_app(
+        SceneKind.Game,
+        replay.map_name,
+        profile=args.profile,
+        replay=replay,
+        game_speed=GameSpeed[args.speed],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3 @@
+from tdp.cli import main
+
+main()
@@ -0,0 +1,166 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import csv
+import dataclasses
+import json
+import logging
+import pathlib
+import time
+from typing import Callable
+
+from tdp.ecs.assets import Assets, load_assets
+from tdp.ecs.components import PlayerResources, ScoreTracker, Spawning
+from tdp.ecs.enums import TurretKind
+from tdp.ecs.headless import HeadlessGame, build_headless_game, place_turrets
+from tdp.ecs.statsrepo import StatsRepo, load_stats_repo
+
+logger = logging.getLogger(__name__)
+
+
+BATCH_FIELDS = (
+    "run",
+    "map",
+    "turret_layout",
+    "seed",
+    "tick",
+    "wave",
+    "money",
+    "score",
+    "game_over",
+)
+
+
+@dataclasses.dataclass(frozen=True)
+class BatchRun:
+    index: int
+
+    map_name: str
+    seed: int
+    turret_layout: tuple[TurretKind, ...] = ()
+
+
+@dataclasses.dataclass
+class WorkerState:
+    assets: Assets
+    stats_repo: StatsRepo
+
+
+# loaded once per worker process and shared by every run it is handed
+worker_state: WorkerState | None = None
+
+
+def init_worker(stats_repo_path: str):
+    global worker_state
+
+    worker_state = WorkerState(
+        assets=load_assets(), stats_repo=load_stats_repo(stats_repo_path)
+    )
+
+
+def sample_game(run: BatchRun, game: HeadlessGame) -> dict:
+    spawning = game.world.get_component(Spawning)[0][1]
+    player_resources = game.world.get_component(PlayerResources)[0][1]
+    score_tracker = game.world.get_component(ScoreTracker)[0][1]
+
+    return {
+        "run": run.index,
+        "map": run.map_name,
+        "turret_layout": "+".join(run.turret_layout),
+        "seed": run.seed,
+        "tick": game.ticks,
+        "wave": spawning.current_wave_num,
+        "money": player_resources.money,
+        "score": score_tracker.total_score,
+        "game_over": game.game_over,
+    }
+
+
+def simulate(
+    run: BatchRun, *, max_ticks: int, sample_every: int, max_turrets: int | None
+) -> list[dict]:
+    """
+    Plays one game headless until game over or `max_ticks`, sampling it
+    every `sample_every` ticks and once more at the end
+    """
+    game = build_headless_game(
+        run.map_name,
+        seed=run.seed,
+        assets=worker_state.assets,
+        stats_repo=worker_state.stats_repo,
+    )
+
+    place_turrets(game, run.turret_layout, max_turrets=max_turrets)
+
+    samples = [sample_game(run, game)]
+
+    while game.ticks < max_ticks and not game.game_over:
+        game.tick()
+
+        if game.ticks % sample_every == 0:
+            samples.append(sample_game(run, game))
+
+    if samples[-1]["tick"] != game.ticks:
+        samples.append(sample_game(run, game))
+
+    return samples
+
+
+def get_sample_writer(f, path: pathlib.Path) -> Callable[[dict], None]:
+    match path.suffix:
+        case ".csv":
+            writer = csv.DictWriter(f, fieldnames=BATCH_FIELDS)
+            writer.writeheader()
+
+            return writer.writerow
+        case ".jsonl":
+            return lambda sample: f.write(json.dumps(sample) + "\n")
+        case _:
+            raise ValueError(f"Unsupported batch output format: {path}")
+
+
+def run_batch(
+    runs: list[BatchRun],
+    *,
+    output: pathlib.Path,
+    max_ticks: int,
+    sample_every: int,
+    max_turrets: int | None = None,
+    workers: int | None = None,
+    stats_repo_path: str = "assets/statsrepo.toml",
+):
+    """
+    Fans the runs out over a process pool, writing each run's samples to a
+    `.csv` or `.jsonl` file as soon as it finishes, so rows are grouped by
+    run but not in run order
+    """
+    output.parent.mkdir(parents=True, exist_ok=True)
+
+    start = time.perf_counter()
+
+    with output.open("w", newline="") as f, ProcessPoolExecutor(
+        max_workers=workers, initializer=init_worker, initargs=(stats_repo_path,)
+    ) as executor:
+        write_sample = get_sample_writer(f, output)
+
+        futures = [
+            executor.submit(
+                simulate,
+                run,
+                max_ticks=max_ticks,
+                sample_every=sample_every,
+                max_turrets=max_turrets,
+            )
+            for run in runs
+        ]
+
+        for finished, future in enumerate(as_completed(futures), start=1):
+            for sample in future.result():
+                write_sample(sample)
+
+            logger.info("Finished %d of %d games", finished, len(runs))
+
+    logger.info(
+        "Ran %d games in %.1fs, samples written to %s",
+        len(runs),
+        time.perf_counter() - start,
+        output,
+    )
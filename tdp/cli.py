@@ -0,0 +1,109 @@
+import argparse
+import itertools
+import logging
+import os
+import pathlib
+import sys
+
+from tdp.batch import BatchRun, run_batch
+from tdp.ecs.enums import TurretKind, enabled_turret_kinds
+
+
+def parse_turret_layout(value: str) -> tuple[TurretKind, ...]:
+    if value == "none":
+        return ()
+
+    try:
+        return tuple(TurretKind(kind) for kind in value.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"expected comma separated turret kinds out of "
+            f"{', '.join(enabled_turret_kinds)}, or none"
+        )
+
+
+def batch(args: argparse.Namespace):
+    runs = [
+        BatchRun(index=index, map_name=map_name, seed=seed, turret_layout=layout)
+        for index, (map_name, layout, seed) in enumerate(
+            itertools.product(
+                args.map or ["winding"],
+                args.layout or [tuple(enabled_turret_kinds)],
+                range(args.first_seed, args.first_seed + args.seeds),
+            )
+        )
+    ]
+
+    run_batch(
+        runs,
+        output=args.output,
+        max_ticks=args.ticks,
+        sample_every=args.sample_every,
+        max_turrets=args.max_turrets,
+        workers=args.workers,
+        stats_repo_path=args.stats,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="tdp")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show progress")
+
+    subparsers = parser.add_subparsers(required=True)
+
+    batch_parser = subparsers.add_parser(
+        "batch",
+        help="run headless games across seeds and turret layouts",
+        description=(
+            "Runs every combination of map, turret layout and seed headless, "
+            "over a pool of processes, sampling each game's wave, money and "
+            "score over time into one file"
+        ),
+    )
+    batch_parser.set_defaults(func=batch)
+    batch_parser.add_argument(
+        "--map", action="append", help="may be given more than once"
+    )
+    batch_parser.add_argument(
+        "--layout",
+        action="append",
+        type=parse_turret_layout,
+        help=(
+            "comma separated turret kinds cycled over the build zones, "
+            "or none; may be given more than once, defaults to all kinds"
+        ),
+    )
+    batch_parser.add_argument("--max-turrets", type=int)
+    batch_parser.add_argument("--seeds", type=int, default=100)
+    batch_parser.add_argument("--first-seed", type=int, default=0)
+    batch_parser.add_argument(
+        "--ticks", type=int, default=30 * 60 * 30, help="per game, at most"
+    )
+    batch_parser.add_argument("--sample-every", type=int, default=300)
+    batch_parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(), help="processes to run"
+    )
+    batch_parser.add_argument(
+        "--stats",
+        default="assets/statsrepo.toml",
+        help="stats repo to balance with",
+    )
+    batch_parser.add_argument(
+        "--output",
+        type=pathlib.Path,
+        default=pathlib.Path("batch.csv"),
+        help=".csv or .jsonl",
+    )
+
+    args = parser.parse_args()
+
+    logging.basicConfig(stream=sys.stderr, level=logging.WARNING)
+
+    if args.verbose:
+        logging.getLogger("tdp.batch").setLevel(logging.INFO)
+
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
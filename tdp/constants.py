@@ -11,6 +11,36 @@ SCREEN_WIDTH, SCREEN_HEIGHT = 960 + GUI_WIDTH, 960
 
 PLAYER_STARTING_MONEY = 75
 
+# game logic advances in steps of this many milliseconds, independent of
+# the display framerate
+FIXED_TICK_DELTA = 1000.0 / 30.0
+
+FRAMERATE = 60
+
+# frame time beyond this is dropped instead of simulated, e.g. after the
+# window was dragged, so logic never has to catch up on a huge backlog
+MAX_FRAME_DELTA = 250.0
+
+# wall time in milliseconds logic ticks may take per frame, the rest of the
+# frame is left for rendering; sped up games slow down rather than fall behind
+LOGIC_TIME_BUDGET = 1000.0 / FRAMERATE / 2
+
+# where profiled games dump their processor timings
+PROFILE_DUMP_DIR = "profiles"
+
+# where every played game saves its replay on exit
+REPLAY_DIR = "replays"
+
+# where quicksaves go
+SAVE_DIR = "saves"
+
+# sprites are rotated in whole steps of this many degrees, so rotated
+# images can be cached and reused
+ROTATION_ANGLE_STEP = 1.0
+
+# rotated images kept around, least recently used are dropped first
+ROTATION_CACHE_SIZE = 2048
+
 MAX_TURRET_PROPERTY_UPGRADE_LEVEL_WITHOUT_RESEARCH = 3
 MAX_TURRET_PROPERTY_UPGRADE_LEVEL_WITH_RESEARCH = 10
 
@@ -40,49 +40,55 @@ class Assets:
 
 
 def load_assets() -> Assets:
-    return Assets(
-        enemies={
-            EnemyKind.Grunt: pygame.image.load("assets/enemies/grunt.png"),
-            EnemyKind.Elite: pygame.image.load("assets/enemies/elite.png"),
-            EnemyKind.Commando: pygame.image.load("assets/enemies/commando.png"),
-            EnemyKind.Tank: pygame.image.load("assets/enemies/tank.png"),
-            EnemyKind.FighterPlane: pygame.image.load(
-                "assets/enemies/fighter-plane.png"
+    return pack_assets(
+        Assets(
+            enemies={
+                EnemyKind.Grunt: pygame.image.load("assets/enemies/grunt.png"),
+                EnemyKind.Elite: pygame.image.load("assets/enemies/elite.png"),
+                EnemyKind.Commando: pygame.image.load("assets/enemies/commando.png"),
+                EnemyKind.Tank: pygame.image.load("assets/enemies/tank.png"),
+                EnemyKind.FighterPlane: pygame.image.load(
+                    "assets/enemies/fighter-plane.png"
+                ),
+                EnemyKind.TransportPlane: pygame.image.load(
+                    "assets/enemies/transport-plane.png"
+                ),
+            },
+            turret_build_zone=pygame.image.load("assets/turrets/buildzone.png"),
+            bullet_turret=pygame.image.load("assets/turrets/mach1.png"),
+            bullet_turret__firing=pygame.image.load("assets/turrets/mach1--firing.png"),
+            flame_turret=pygame.image.load("assets/turrets/flame1.png"),
+            flame_particle=pygame.image.load("assets/turrets/flame-particle.png"),
+            lightning_turret=pygame.image.load("assets/turrets/lightning1.png"),
+            lightning_strike_frames=load_sheet_frames(
+                "assets/turrets/lightning-strike-sheet.png", (128, 128)
             ),
-            EnemyKind.TransportPlane: pygame.image.load(
-                "assets/enemies/transport-plane.png"
+            lightning_strike_chain_lightning_frames=load_sheet_frames(
+                "assets/turrets/lightning-strike-chain-lightning-sheet.png", (32, 32)
             ),
-        },
-        turret_build_zone=pygame.image.load("assets/turrets/buildzone.png"),
-        bullet_turret=pygame.image.load("assets/turrets/mach1.png"),
-        bullet_turret__firing=pygame.image.load("assets/turrets/mach1--firing.png"),
-        flame_turret=pygame.image.load("assets/turrets/flame1.png"),
-        flame_particle=pygame.image.load("assets/turrets/flame-particle.png"),
-        lightning_turret=pygame.image.load("assets/turrets/lightning1.png"),
-        lightning_strike_frames=load_sheet_frames(
-            "assets/turrets/lightning-strike-sheet.png", (128, 128)
-        ),
-        lightning_strike_chain_lightning_frames=load_sheet_frames(
-            "assets/turrets/lightning-strike-chain-lightning-sheet.png", (32, 32)
-        ),
-        poison_turret=pygame.image.load("assets/turrets/poison1.png"),
-        poison_strike_frames=load_sheet_frames(
-            "assets/turrets/poison-explosion-sheet.png", (128, 128)
-        )[5:12],
-        rocket_turret=pygame.image.load("assets/turrets/rocket1.png"),
-        rocket_turret__reloading=pygame.image.load(
-            "assets/turrets/rocket1--reloading.png"
-        ),
-        rocket_missile=pygame.image.load("assets/turrets/rocket-missile.png"),
-        rocket_missile_explosion=pygame.image.load(
-            "assets/turrets/rocket-missile-explosion.png"
-        ),
-        tornado_turret=pygame.image.load("assets/turrets/tornado1.png"),
-        tornado_strike_frames=load_sheet_frames(
-            "assets/turrets/wind-strike-sheet.png", (128, 128)
-        )[3:13],
-        burning_status_effect=pygame.image.load("assets/enemies/status/burning.png"),
-        poisoned_status_effect=pygame.image.load("assets/enemies/status/poisoned.png"),
+            poison_turret=pygame.image.load("assets/turrets/poison1.png"),
+            poison_strike_frames=load_sheet_frames(
+                "assets/turrets/poison-explosion-sheet.png", (128, 128)
+            )[5:12],
+            rocket_turret=pygame.image.load("assets/turrets/rocket1.png"),
+            rocket_turret__reloading=pygame.image.load(
+                "assets/turrets/rocket1--reloading.png"
+            ),
+            rocket_missile=pygame.image.load("assets/turrets/rocket-missile.png"),
+            rocket_missile_explosion=pygame.image.load(
+                "assets/turrets/rocket-missile-explosion.png"
+            ),
+            tornado_turret=pygame.image.load("assets/turrets/tornado1.png"),
+            tornado_strike_frames=load_sheet_frames(
+                "assets/turrets/wind-strike-sheet.png", (128, 128)
+            )[3:13],
+            burning_status_effect=pygame.image.load(
+                "assets/enemies/status/burning.png"
+            ),
+            poisoned_status_effect=pygame.image.load(
+                "assets/enemies/status/poisoned.png"
+            ),
+        )
     )
 
 
@@ -116,3 +122,101 @@ def load_sheet_frames(
     logger.debug("Loaded %d frames from sheet %s", len(frames), filename)
 
     return frames
+
+
+def pack_assets(assets: Assets) -> Assets:
+    """
+    Swaps every image for its region of one shared atlas surface
+    """
+    images: list[pygame.Surface] = []
+
+    for field in dataclasses.fields(assets):
+        match getattr(assets, field.name):
+            case pygame.Surface() as image:
+                images.append(image)
+            case list() as frames:
+                images.extend(frames)
+            case dict() as images_by_kind:
+                images.extend(images_by_kind.values())
+
+    # surfaces hash by identity, so shared images are packed once
+    unique_images = list(dict.fromkeys(images))
+
+    packed = dict(zip(unique_images, build_atlas(unique_images)))
+
+    changes = {}
+
+    for field in dataclasses.fields(assets):
+        match getattr(assets, field.name):
+            case pygame.Surface() as image:
+                changes[field.name] = packed[image]
+            case list() as frames:
+                changes[field.name] = [packed[frame] for frame in frames]
+            case dict() as images_by_kind:
+                changes[field.name] = {
+                    kind: packed[image] for kind, image in images_by_kind.items()
+                }
+
+    return dataclasses.replace(assets, **changes)
+
+
+def build_atlas(
+    images: list[pygame.Surface], *, max_width: int = 1024
+) -> list[pygame.Surface]:
+    """
+    Packs images into shelves on one surface, tallest first, and returns
+    subsurfaces of it in the same order as `images`
+    """
+    order = sorted(
+        range(len(images)), key=lambda i: images[i].get_height(), reverse=True
+    )
+
+    positions: dict[int, tuple[int, int]] = {}
+
+    x, y, shelf_height = 0, 0, 0
+
+    for i in order:
+        width, height = images[i].get_size()
+
+        if x + width > max_width and x > 0:
+            # next shelf
+            x = 0
+            y += shelf_height
+            shelf_height = 0
+
+        positions[i] = (x, y)
+
+        x += width
+        shelf_height = max(shelf_height, height)
+
+    atlas_width = max(
+        (positions[i][0] + images[i].get_width() for i in order), default=0
+    )
+
+    atlas = pygame.Surface((atlas_width, y + shelf_height), pygame.SRCALPHA)
+
+    # adding onto the blank atlas copies pixels as they are, a normal blit
+    # would blend translucent edges against it
+    atlas.blits(
+        [
+            (image, positions[i], None, pygame.BLEND_RGBA_ADD)
+            for i, image in enumerate(images)
+        ],
+        doreturn=False,
+    )
+
+    # display format blits fastest, but needs a display to convert to
+    if pygame.display.get_surface() is not None:
+        atlas = atlas.convert_alpha()
+
+    logger.debug(
+        "Packed %d images into a %dx%d atlas",
+        len(images),
+        atlas.get_width(),
+        atlas.get_height(),
+    )
+
+    return [
+        atlas.subsurface(pygame.Rect(positions[i], image.get_size()))
+        for i, image in enumerate(images)
+    ]
@@ -2,7 +2,9 @@ from collections import defaultdict
 from typing import Any, Protocol
 
 import dataclasses
+import random
 
+import numpy as np
 from pygame import Rect, Vector2, Surface
 
 from .assets import Assets
@@ -17,12 +19,14 @@ from .enums import (
     ScoreEventKind,
     TurretState,
     TurretKind,
+    TurretTargetPriority,
     PlayerInputState,
     TurretUpgradeablePropertyKind,
     VelocityAdjustmentKind,
     DamagesEnemyEffectKind,
     VelocityAdjustmentSource,
 )
+from .spatial import RectHashGrid, SpatialHashGrid
 from .types import SpawningWaveStep
 
 from . import esper
@@ -50,6 +54,46 @@ class Enemy:
         self.health = self.max_health
 
 
+@dataclasses.dataclass
+class SimulationRandom:
+    """
+    The one source of randomness for game logic, so a seed and the player's
+    actions reproduce a game exactly
+    """
+
+    seed: int
+
+    rng: random.Random = dataclasses.field(init=False)
+
+    def __post_init__(self):
+        self.rng = random.Random(self.seed)
+
+
+@dataclasses.dataclass
+class EnemySpatialIndex:
+    """
+    Enemy positions bucketed by grid cell, taken once per frame after
+    enemies have moved and spawned, the grid's points being the entities
+    """
+
+    grid: SpatialHashGrid = dataclasses.field(default_factory=SpatialHashGrid)
+    entities: list[int] = dataclasses.field(default_factory=list)
+
+
+@dataclasses.dataclass
+class EnemyCollisions:
+    """
+    Broad phase results, rebuilt once per frame: the enemies overlapping each
+    DamagesEnemy entity, and the Despawnable entities overlapping each
+    Despawning entity
+    """
+
+    grid: RectHashGrid = dataclasses.field(default_factory=RectHashGrid)
+
+    damages_enemy: dict[int, list[int]] = dataclasses.field(default_factory=dict)
+    despawning: dict[int, list[int]] = dataclasses.field(default_factory=dict)
+
+
 @dataclasses.dataclass
 class SpawningWave:
     wave: list[SpawningWaveStep]
@@ -82,6 +126,9 @@ class Spawning:
     waves: list[SpawningWave]
     current_wave_index: int = 0
 
+    # enemies take turns between the map's spawn points
+    spawn_count: int = 0
+
     def advance(self):
         self.current_wave_index += 1
 
@@ -219,6 +266,25 @@ class Renderable:
         return bool(self.extras)
 
 
+@dataclasses.dataclass
+class GameMap:
+    # the map's entity, created headless too, its images only when rendering
+    name: str
+
+
+@dataclasses.dataclass
+class MapBackground:
+    # static tile layers, baked once when the map is loaded
+    image: Surface
+
+
+@dataclasses.dataclass
+class MapTiles:
+    # tileset images by tiled gid, kept so anything drawn with one, like
+    # build zones, can be saved as a reference to it
+    images: list[Surface | None]
+
+
 @dataclasses.dataclass
 class Lifetime:
     remaining: float = 0.0
@@ -229,23 +295,143 @@ class BoundingBox:
     rect: Rect
     rotation: Vector2 = dataclasses.field(default_factory=lambda: Vector2(1, 0))
 
+    # center at the start of the last logic tick, for interpolating moving
+    # entities between ticks when rendering
+    previous_center: tuple[int, int] | None = None
+
+    # center before rounding to whole pixels, for entities moving freely
+    # rather than along a path, so a restored snapshot carries on from it
+    unrounded_center: tuple[float, float] | None = None
+
 
 @dataclasses.dataclass
 class PathGraph:
-    vertices: list[Vector2] = dataclasses.field(default_factory=list)
+    """
+    A path as a polyline, with the distance along it to each vertex and the
+    direction of each segment precomputed when the map is loaded, so where a
+    unit is on the path is a lookup by its distance along it
+    """
+
+    vertices: list[Vector2]
+
+    points: np.ndarray = dataclasses.field(init=False)
+    # distance along the path to each vertex, starting at 0
+    lengths: np.ndarray = dataclasses.field(init=False)
+    # unit vector of each segment
+    directions: np.ndarray = dataclasses.field(init=False)
+
+    def __post_init__(self):
+        self.points = np.array(self.vertices, dtype=float).reshape(-1, 2)
+
+        offsets = np.diff(self.points, axis=0)
+        segment_lengths = np.sqrt(np.sum(offsets * offsets, axis=1))
+
+        self.lengths = np.concatenate(([0.0], np.cumsum(segment_lengths)))
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.directions = np.nan_to_num(offsets / segment_lengths[:, None])
+
+        # segments without length, e.g. a vertex repeated, keep the heading
+        # of the segment before, or after for the first ones
+        (has_length,) = np.nonzero(segment_lengths)
+
+        if len(has_length):
+            previous = np.maximum.accumulate(
+                np.where(segment_lengths > 0, np.arange(len(segment_lengths)), -1)
+            )
+
+            self.directions = self.directions[
+                np.where(previous >= 0, previous, has_length[0])
+            ]
+
+    @property
+    def length(self) -> float:
+        return float(self.lengths[-1])
+
+    def segments_at(self, distances: np.ndarray) -> np.ndarray:
+        return np.clip(
+            np.searchsorted(self.lengths, distances, side="right") - 1,
+            0,
+            len(self.directions) - 1,
+        )
+
+    def positions_at(self, distances: np.ndarray) -> np.ndarray:
+        segments = self.segments_at(distances)
+
+        return (
+            self.points[segments]
+            + self.directions[segments] * (distances - self.lengths[segments])[:, None]
+        )
 
 
 @dataclasses.dataclass
 class UnitPathing:
-    vertices: list[Vector2] = dataclasses.field(default_factory=list)
-    index: int = 0
+    path: PathGraph
+
+    # how far along the path the unit is
+    distance: float = 0.0
 
     @property
-    def current_target(self):
-        return self.vertices[self.index]
+    def position(self) -> Vector2:
+        return Vector2(*self.path.positions_at(np.array([self.distance]))[0])
 
-    def advance(self):
-        self.index = min(self.index + 1, len(self.vertices) - 1)
+    @property
+    def direction(self) -> Vector2:
+        return Vector2(*self.path.directions[self.path.segments_at(self.distance)])
+
+    @property
+    def remaining(self) -> float:
+        return self.path.length - self.distance
+
+
+@dataclasses.dataclass
+class PathNetwork:
+    """
+    Every path through a map as a graph of vertices, with routing tables
+    built when the map is loaded: the branches out of each vertex that lead
+    to an exit, weighted, and the distance from each vertex to the closest
+    exit. The path of a route is only built the first time a unit takes it.
+    """
+
+    vertices: list[Vector2]
+
+    # (vertex, weight) per branch, none for exits
+    next_hops: list[list[tuple[int, float]]]
+    distance_to_exit: list[float]
+
+    routes: dict[tuple[int, ...], PathGraph] = dataclasses.field(default_factory=dict)
+
+    def route(self, start: int, rng: random.Random) -> PathGraph:
+        """
+        Path of a route from the start, picking branches by weight
+        """
+        route = [start]
+
+        while next_hops := self.next_hops[route[-1]]:
+            # only branches draw from the rng, so a single path draws nothing
+            if len(next_hops) == 1:
+                ((vertex, _),) = next_hops
+            else:
+                vertices, weights = zip(*next_hops)
+                (vertex,) = rng.choices(vertices, weights=weights)
+
+            route.append(vertex)
+
+        route = tuple(route)
+
+        if (path := self.routes.get(route)) is None:
+            path = self.routes[route] = PathGraph(
+                vertices=[self.vertices[vertex] for vertex in route]
+            )
+
+        return path
+
+
+@dataclasses.dataclass
+class SpawnPoint:
+    network: PathNetwork
+    # vertex of the network units start from
+    vertex: int
 
 
 class TurretBuildZone:
@@ -269,6 +455,8 @@ class TurretMachine:
 
     idle_rotation_speed: float = 0.025
 
+    target_priority: TurretTargetPriority = TurretTargetPriority.Closest
+
     upgrade_levels: dict[TurretUpgradeablePropertyKind, int] = dataclasses.field(
         default_factory=lambda: {k: 1 for k in TurretUpgradeablePropertyKind}
     )
@@ -313,6 +501,16 @@ class TurretMachine:
         return self._per_level_stat(TurretUpgradeablePropertyKind.DOTDuration)
 
 
+@dataclasses.dataclass
+class TurretTarget:
+    """
+    Enemy in range the turret aims at by its target priority, picked for
+    every turret at once by TurretTargetingProcessor each frame
+    """
+
+    enemy: int | None = None
+
+
 @dataclasses.dataclass
 class PlayerResources:
     money: int
@@ -1,14 +1,16 @@
 from functools import partial
 from typing import Callable
 import logging
-import random
 
 import pygame
 
 from pygame import Rect, Vector2
 from tdp.ecs.statsrepo import EnemyStats, StatsRepo
 
-from tdp.ecs.util import get_enemies_in_range, unit_pathing_to_path_graph
+from tdp.ecs.util import (
+    get_enemies_in_range,
+    get_simulation_random,
+)
 
 
 from ..constants import (
@@ -37,6 +39,7 @@ from .components import (
     Spawning,
     SpawnsEnemies,
     TurretMachine,
+    TurretTarget,
     UnitPathing,
     Velocity,
     Renderable,
@@ -101,7 +104,7 @@ def build_additional_components_for_enemy_kind(
     return []
 
 
-def spawn_enemy(
+def build_enemy_components(
     world: esper.World,
     spawn_bbox: BoundingBox,
     spawn_path_graph: PathGraph,
@@ -109,7 +112,9 @@ def spawn_enemy(
     level: int,
     stats_repo: StatsRepo,
     assets: Assets,
-):
+    *,
+    path_distance: float = 0.0,
+) -> list:
     additional_components = build_additional_components_for_enemy_kind(
         world, spawn_bbox, spawn_path_graph, enemy_kind, level, stats_repo, assets
     )
@@ -121,27 +126,49 @@ def spawn_enemy(
 
     bounty = enemy_stats["base_bounty"] + level * enemy_stats["bounty_per_level"]
 
+    unit_pathing = UnitPathing(path=spawn_path_graph, distance=path_distance)
+
+    # placed on the path right away
     image_rect = image.get_rect()
+    image_rect.center = unit_pathing.position
 
-    return world.create_entity(
+    return [
         Enemy(bounty=bounty, max_health=max_health),
         # initialize velocity with unit speed
         Velocity(vec=Vector2(enemy_stats["speed"], 0)),
-        BoundingBox(
-            rect=Rect(
-                spawn_bbox.rect.centerx,
-                spawn_bbox.rect.centery - image_rect.height / 2,
-                image_rect.width,
-                image_rect.height,
-            )
-        ),
+        BoundingBox(rect=image_rect),
         Renderable(
             order=RenderableOrder.Objects,
             image=image,
         ),
         Despawnable(),
-        UnitPathing(vertices=spawn_path_graph.vertices),
+        unit_pathing,
         *additional_components,
+    ]
+
+
+def spawn_enemy(
+    world: esper.World,
+    spawn_bbox: BoundingBox,
+    spawn_path_graph: PathGraph,
+    enemy_kind: EnemyKind,
+    level: int,
+    stats_repo: StatsRepo,
+    assets: Assets,
+    *,
+    path_distance: float = 0.0,
+):
+    return world.create_entity(
+        *build_enemy_components(
+            world,
+            spawn_bbox,
+            spawn_path_graph,
+            enemy_kind,
+            level,
+            stats_repo,
+            assets,
+            path_distance=path_distance,
+        )
     )
 
 
@@ -157,16 +184,20 @@ def process_on_death_behavior(
         bbox = world.component_for_entity(enemy_ent, BoundingBox)
         unit_pathing = world.component_for_entity(enemy_ent, UnitPathing)
 
-        for enemy_kind in on_death_behavior.enemies:
-            spawn_enemy(
+        # spawned units carry on from where this one died
+        world.create_entities(
+            build_enemy_components(
                 world,
                 bbox,
-                unit_pathing_to_path_graph(unit_pathing),
+                unit_pathing.path,
                 enemy_kind,
                 spawning.current_wave_index,
                 stats_repo,
                 assets,
+                path_distance=unit_pathing.distance,
             )
+            for enemy_kind in on_death_behavior.enemies
+        )
 
 
 def kill_enemy(
@@ -222,6 +253,7 @@ def create_flame_turret(
         ),
         bbox,
         Renderable(image=image, order=RenderableOrder.Objects),
+        TurretTarget(),
     )
 
 
@@ -268,6 +300,7 @@ def create_frost_turret(
         ),
         bbox,
         Renderable(image=image, order=RenderableOrder.Objects),
+        TurretTarget(),
     )
 
 
@@ -299,6 +332,7 @@ def create_rocket_turret(
         ),
         bbox,
         Renderable(image=image, order=RenderableOrder.Objects),
+        TurretTarget(),
     )
 
 
@@ -330,6 +364,7 @@ def create_bullet_turret(
         ),
         bbox,
         Renderable(image=image, order=RenderableOrder.Objects),
+        TurretTarget(),
     )
 
 
@@ -360,6 +395,7 @@ def create_lightning_turret(
         ),
         bbox,
         Renderable(image=image, order=RenderableOrder.Objects),
+        TurretTarget(),
     )
 
 
@@ -390,6 +426,7 @@ def create_poison_turret(
         ),
         bbox,
         Renderable(image=image, order=RenderableOrder.Objects),
+        TurretTarget(),
     )
 
 
@@ -420,6 +457,7 @@ def create_tornado_turret(
         ),
         bbox,
         Renderable(image=image, order=RenderableOrder.Objects),
+        TurretTarget(),
     )
 
 
@@ -626,7 +664,7 @@ def create_tornado(
     explosion_rect = Rect((0, 0), image_rect.size)
     explosion_rect.center = enemy_bbox.rect.center
 
-    vec = Vector2(0.025, 0).rotate(random.uniform(-180.0, 180.0))
+    vec = Vector2(0.025, 0).rotate(get_simulation_random(world).uniform(-180.0, 180.0))
 
     world.create_entity(
         animated,
@@ -677,6 +715,8 @@ def create_lightning_strike_chain_lightning(
 
     enemies_in_range = [ent for ent in enemies_in_range if ent not in shocked_enemies]
 
+    chain_lightnings = []
+
     for nearby_enemy_ent in enemies_in_range:
         nearby_enemy_bbox = world.component_for_entity(nearby_enemy_ent, BoundingBox)
 
@@ -690,31 +730,35 @@ def create_lightning_strike_chain_lightning(
         explosion_rect = Rect((0, 0), image_rect.size)
         explosion_rect.center = nearby_enemy_bbox.rect.center
 
-        world.create_entity(
-            animated,
-            BoundingBox(rect=explosion_rect),
-            Renderable(image=base_image, order=RenderableOrder.Objects),
-            TimeToLive(duration=2 * 800.0),  # synced with animation
-            DamagesEnemy(
-                damage=damage,
-                on_collision_behavior=DamagesEnemyOnCollisionBehavior.RemoveComponent,
-                effects=[
-                    DamagesEnemyEffect(
-                        kind=DamagesEnemyEffectKind.AddsComponent,
-                        component=Shocked(duration=500.0),
-                    ),
-                    DamagesEnemyEffect(
-                        kind=DamagesEnemyEffectKind.DynamicCreator,
-                        dynamic_effect_creator=partial(
-                            create_lightning_strike_chain_lightning,
-                            damage=damage,
-                            range=range,
+        chain_lightnings.append(
+            (
+                animated,
+                BoundingBox(rect=explosion_rect),
+                Renderable(image=base_image, order=RenderableOrder.Objects),
+                TimeToLive(duration=2 * 800.0),  # synced with animation
+                DamagesEnemy(
+                    damage=damage,
+                    on_collision_behavior=DamagesEnemyOnCollisionBehavior.RemoveComponent,
+                    effects=[
+                        DamagesEnemyEffect(
+                            kind=DamagesEnemyEffectKind.AddsComponent,
+                            component=Shocked(duration=500.0),
                         ),
-                    ),
-                ],
-            ),
+                        DamagesEnemyEffect(
+                            kind=DamagesEnemyEffectKind.DynamicCreator,
+                            dynamic_effect_creator=partial(
+                                create_lightning_strike_chain_lightning,
+                                damage=damage,
+                                range=range,
+                            ),
+                        ),
+                    ],
+                ),
+            )
         )
 
+    world.create_entities(chain_lightnings)
+
 
 def create_flame(
     world: esper.World, turret_ent: int, enemy_ent: int, *, assets: Assets
@@ -732,7 +776,7 @@ def create_flame(
 
     # introduce random rotation, flame turret creates "cone" of flame
     # +30, -30 deg range (60 deg total cone)
-    vec = vec.rotate(random.uniform(-30.0, 30.0))
+    vec = vec.rotate(get_simulation_random(world).uniform(-30.0, 30.0))
 
     speed = 0.20
     vec.scale_to_length(speed)
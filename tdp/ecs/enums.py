@@ -1,6 +1,22 @@
 import enum
 
 
+class ProcessorGroup(enum.IntEnum):
+    # advances the game by one fixed tick
+    Logic = enum.auto()
+    # draws and syncs the gui, once per display frame
+    Render = enum.auto()
+
+
+class GameSpeed(enum.IntEnum):
+    # multiplier of simulated time per real time
+    Normal = 1
+    Fast = 2
+    Faster = 4
+    # as many logic ticks as fit in each frame
+    Max = 0
+
+
 class ScoreEventKind(enum.IntEnum):
     EnemyKill = enum.auto()
     EnemyDespawn = enum.auto()
@@ -30,6 +46,9 @@ class PlayerActionKind(enum.IntEnum):
 
     ExitGame = enum.auto()
 
+    # after the rest, replays keep the raw values
+    SetTurretTargetPriority = enum.auto()
+
 
 class RenderableExtraOrder(enum.IntEnum):
     Under = -1
@@ -101,6 +120,14 @@ class TurretUpgradeablePropertyKind(enum.StrEnum):
     DOTDuration = "dot_duration"
 
 
+class TurretTargetPriority(enum.StrEnum):
+    Closest = "closest"
+    Furthest = "furthest"
+    LowestHealth = "lowest_health"
+    HighestMaxHealth = "highest_max_health"
+    FirstAlongPath = "first_along_path"
+
+
 class PlayerInputState(enum.IntEnum):
     GameOver = enum.auto()
     Idle = enum.auto()
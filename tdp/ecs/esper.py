@@ -26,9 +26,11 @@ See: https://github.com/benmoran56/esper
 
 import time as _time
 
+from itertools import chain as _chain
 from types import MethodType as _MethodType
 
 from typing import overload, Any
+from typing import Callable as _Callable
 from typing import Iterable as _Iterable
 from typing import List as _List
 from typing import Optional as _Optional
@@ -149,12 +151,208 @@ class Processor:
     """
 
     priority = 0
+    group: Any = None
     world: "World"
 
     def process(self, *args, **kwargs):
         raise NotImplementedError
 
 
+class _Archetype:
+    """A table of Entities that share the exact same set of Component types.
+
+    Each Component type gets its own column, and an Entity's Components all
+    live at the same row index. Removing an Entity swaps the last row into
+    its place, so rows stay contiguous. Every change to the rows is mirrored
+    in the segments of the cached queries matching the archetype.
+    """
+
+    __slots__ = ("signature", "entities", "rows", "columns", "queries", "edges")
+
+    def __init__(self, signature: frozenset) -> None:
+        self.signature = signature
+        self.entities: _List[int] = []
+        self.rows: dict = {}
+        self.columns: dict = {component_type: [] for component_type in signature}
+        # cached queries matching this archetype, each with a segment of it
+        self.queries: _List[_Query] = []
+        # archetypes reached by adding or removing a single Component type
+        self.edges: dict = {}
+
+    def append(self, entity: int, components: dict) -> None:
+        self.rows[entity] = len(self.entities)
+        self.entities.append(entity)
+
+        for component_type, column in self.columns.items():
+            column.append(components[component_type])
+
+        for query in self.queries:
+            query.append(self, entity, components)
+
+    def pop(self, entity: int) -> dict:
+        """Remove an Entity's row, returning its Components by type."""
+        row = self.rows.pop(entity)
+        last_entity = self.entities.pop()
+        components = {}
+
+        for component_type, column in self.columns.items():
+            last_component = column.pop()
+
+            if last_entity == entity:
+                components[component_type] = last_component
+            else:
+                components[component_type] = column[row]
+                column[row] = last_component
+
+        if last_entity != entity:
+            self.entities[row] = last_entity
+            self.rows[last_entity] = row
+
+        for query in self.queries:
+            query.pop(self, row)
+
+        return components
+
+    def replace(self, entity: int, component_type: _Type, component_instance) -> Any:
+        """Replace one of an Entity's Components in place, returning the old one."""
+        row = self.rows[entity]
+        column = self.columns[component_type]
+
+        previous_instance = column[row]
+        column[row] = component_instance
+
+        for query in self.queries:
+            if component_type in query.component_types:
+                query.replace(self, row)
+
+        return previous_instance
+
+
+class _Query:
+    """The cached results of a query, one segment per matching archetype.
+
+    Segments mirror their archetype's rows, and are patched a row at a time
+    as Entities come and go, so no change ever rescans the world. Callers
+    get a list snapshot of all segments, only put together again after one
+    of them changed, so changing the World while iterating one is safe.
+    """
+
+    __slots__ = ("component_types", "single", "segments", "results")
+
+    def __init__(self, component_types: tuple, single: bool) -> None:
+        self.component_types = component_types
+        # get_component results pair Entities with a Component, rather than
+        # with a tuple of them
+        self.single = single
+        # in the order the archetypes were created
+        self.segments: dict = {}
+        self.results: _Optional[list] = None
+
+    def _row(self, archetype: _Archetype, row: int):
+        if self.single:
+            return archetype.columns[self.component_types[0]][row]
+
+        return tuple(archetype.columns[ct][row] for ct in self.component_types)
+
+    def add_archetype(self, archetype: _Archetype) -> None:
+        columns = [archetype.columns[ct] for ct in self.component_types]
+
+        self.segments[archetype] = list(
+            zip(archetype.entities, columns[0] if self.single else zip(*columns))
+        )
+        archetype.queries.append(self)
+        self.results = None
+
+    def append(self, archetype: _Archetype, entity: int, components: dict) -> None:
+        if self.single:
+            row = components[self.component_types[0]]
+        else:
+            row = tuple(components[ct] for ct in self.component_types)
+
+        self.segments[archetype].append((entity, row))
+        self.results = None
+
+    def pop(self, archetype: _Archetype, row: int) -> None:
+        # swaps the last row in, like the archetype
+        segment = self.segments[archetype]
+        last = segment.pop()
+
+        if row < len(segment):
+            segment[row] = last
+
+        self.results = None
+
+    def replace(self, archetype: _Archetype, row: int) -> None:
+        segment = self.segments[archetype]
+        segment[row] = (segment[row][0], self._row(archetype, row))
+        self.results = None
+
+    def get_results(self) -> list:
+        if self.results is None:
+            self.results = list(_chain.from_iterable(self.segments.values()))
+
+        return self.results
+
+
+# kinds of queued commands
+_CREATE_ENTITY = 0
+_ADD_COMPONENT = 1
+_REMOVE_COMPONENT = 2
+_DELETE_ENTITY = 3
+
+
+class CommandBuffer:
+    """Queues changes to a World's Entities, to be applied later in one go.
+
+    Processors can queue creates, additions and removals while iterating
+    over query results, without changing the archetypes underneath them.
+    A World applies its queued commands after each Processor has run, see
+    :py:meth:`esper.World.flush_commands`.
+    """
+
+    __slots__ = ("_world", "_commands")
+
+    def __init__(self, world: "World") -> None:
+        self._world = world
+        self._commands: list = []
+
+    def __len__(self) -> int:
+        return len(self._commands)
+
+    def create_entity(self, *components: _C) -> int:
+        """Queue creating an Entity, returning the ID it will have.
+
+        The ID is reserved straight away, so further commands can refer to
+        the Entity before it exists.
+        """
+        self._world._next_entity_id += 1
+
+        entity = self._world._next_entity_id
+
+        self._commands.append((_CREATE_ENTITY, entity, components))
+
+        return entity
+
+    def add_component(
+        self,
+        entity: int,
+        component_instance: _C,
+        type_alias: _Optional[_Type[_C]] = None,
+    ) -> None:
+        """Queue adding a Component instance to an Entity."""
+        self._commands.append(
+            (_ADD_COMPONENT, entity, (component_instance, type_alias))
+        )
+
+    def remove_component(self, entity: int, component_type: _Type[_C]) -> None:
+        """Queue removing a Component instance from an Entity, by type."""
+        self._commands.append((_REMOVE_COMPONENT, entity, component_type))
+
+    def delete_entity(self, entity: int) -> None:
+        """Queue deleting an Entity, which happens as soon as it is applied."""
+        self._commands.append((_DELETE_ENTITY, entity, None))
+
+
 class World:
     """A World object keeps track of all Entities, Components, and Processors.
 
@@ -166,39 +364,227 @@ class World:
     def __init__(self, timed=False):
         self._processors = []
         self._next_entity_id = 0
-        self._components = {}
-        self._entities = {}
         self._dead_entities = set()
 
-        self._get_component_cache = {}
-        self._get_components_cache = {}
+        # component storage is split into archetypes, one per distinct set of
+        # component types, and each entity maps to the archetype holding it
+        self._archetypes = {}
+        self._entities = {}
+
+        # cached query results, by Component type for get_component and by
+        # tuple of them for get_components, patched as archetypes change
+        self._queries = {}
+
+        # (on_add, on_remove) callbacks per Component type
+        self._component_handlers = {}
+
+        # changes queued by Processors, applied after each one runs
+        self.commands = CommandBuffer(self)
 
         if timed:
+            # last run time of each Processor, in milliseconds
             self.process_times = {}
+            # optionally also handed every timing, in nanoseconds, see
+            # tdp.ecs.profiling
+            self.profiler = None
             self._process = self._timed_process
 
     def clear_cache(self) -> None:
         """Manually clear the internal cache."""
-        self._get_component_cache.clear()
-        self._get_components_cache.clear()
+        for archetype in self._archetypes.values():
+            archetype.queries.clear()
+
+        self._queries.clear()
+
+    def _get_archetype(self, signature: frozenset) -> _Archetype:
+        try:
+            return self._archetypes[signature]
+        except KeyError:
+            pass
+
+        archetype = self._archetypes[signature] = _Archetype(signature)
+
+        for query in self._queries.values():
+            if signature.issuperset(query.component_types):
+                query.add_archetype(archetype)
+
+        return archetype
+
+    def _move_entity(
+        self, entity: int, archetype: _Archetype, components: dict
+    ) -> None:
+        archetype.append(entity, components)
+        self._entities[entity] = archetype
+
+    def _query(self, key: Any, component_types: tuple, single: bool) -> list:
+        try:
+            return self._queries[key].get_results()
+        except KeyError:
+            pass
+
+        query = self._queries[key] = _Query(component_types, single)
+
+        for signature, archetype in self._archetypes.items():
+            if signature.issuperset(component_types):
+                query.add_archetype(archetype)
+
+        return query.get_results()
+
+    def set_component_handler(
+        self,
+        component_type: _Type[_C],
+        on_add: _Optional[_Callable[[int, _C], None]] = None,
+        on_remove: _Optional[_Callable[[int, _C], None]] = None,
+    ) -> None:
+        """Register callbacks for a Component type being added or removed.
+
+        `on_add(entity, component)` is called after a Component of this type
+        is added to an Entity, and `on_remove(entity, component)` after one
+        is removed, including when its Entity is deleted. Replacing a
+        Component in place counts as removing the old one and adding the new.
+        """
+        self._component_handlers.setdefault(component_type, []).append(
+            (on_add, on_remove)
+        )
+
+    def _components_added(self, entity: int, components: dict) -> None:
+        for component_type, component_instance in components.items():
+            for on_add, _ in self._component_handlers.get(component_type, ()):
+                if on_add is not None:
+                    on_add(entity, component_instance)
+
+    def _components_removed(self, entity: int, components: dict) -> None:
+        for component_type, component_instance in components.items():
+            for _, on_remove in self._component_handlers.get(component_type, ()):
+                if on_remove is not None:
+                    on_remove(entity, component_instance)
 
     def clear_database(self) -> None:
         """Remove all Entities and Components from the World."""
+        if self._component_handlers:
+            for archetype in self._archetypes.values():
+                for entity in list(archetype.entities):
+                    self._components_removed(entity, archetype.pop(entity))
+
         self._dead_entities.clear()
+        self.commands._commands.clear()
         self._entities.clear()
-        self._components.clear()
+        self._archetypes.clear()
+        self._queries.clear()
         self._next_entity_id = 0
         self.clear_cache()
 
-    def add_processor(self, processor_instance: Processor, priority=0) -> None:
+    def get_archetype_tables(self) -> _List[_Tuple[tuple, _List[int], _List[list]]]:
+        """Get every Entity and Component, one table per archetype.
+
+        Each table is a tuple of `(component_types, entities, columns)`, with
+        one column per Component type in the same order, and a row per Entity.
+        Entities pending deletion are left out, with the rows in the order
+        deleting them will leave. The lists are copies, but the Component
+        instances are not; this is meant for saving state.
+
+        Empty archetypes are kept, since queries iterate archetypes in the
+        order they were created.
+        """
+        tables = []
+
+        for archetype in self._archetypes.values():
+            rows = list(range(len(archetype.entities)))
+            positions = None
+
+            # same order as _clear_dead_entities, swapping rows like pop
+            for entity in self._dead_entities:
+                if self._entities.get(entity) is not archetype:
+                    continue
+
+                if positions is None:
+                    positions = dict(archetype.rows)
+
+                position = positions.pop(entity)
+                last_row = rows.pop()
+
+                if position < len(rows):
+                    rows[position] = last_row
+                    positions[archetype.entities[last_row]] = position
+
+            component_types = tuple(archetype.columns)
+
+            tables.append(
+                (
+                    component_types,
+                    [archetype.entities[row] for row in rows],
+                    [
+                        [archetype.columns[component_type][row] for row in rows]
+                        for component_type in component_types
+                    ],
+                )
+            )
+
+        return tables
+
+    def load_archetype_tables(
+        self,
+        tables: _Iterable[_Tuple[tuple, _List[int], _List[list]]],
+        last_entity_id: int,
+    ) -> None:
+        """Replace all Entities and Components with ones saved by
+        :py:meth:`esper.World.get_archetype_tables`.
+
+        Each table fills its archetype's columns in one go, and cached queries
+        are cleared, to be rebuilt from the columns on their next call, rather
+        than moving Entities one Component at a time. Component handlers are still called for every
+        restored Component. New Entities are numbered after `last_entity_id`.
+        """
+        self.clear_database()
+
+        for component_types, entities, columns in tables:
+            archetype = self._get_archetype(frozenset(component_types))
+
+            archetype.rows.update(
+                (entity, row)
+                for row, entity in enumerate(entities, start=len(archetype.entities))
+            )
+            archetype.entities.extend(entities)
+
+            for component_type, column in zip(component_types, columns):
+                archetype.columns[component_type].extend(column)
+
+            self._entities.update(dict.fromkeys(entities, archetype))
+
+        self._next_entity_id = last_entity_id
+        self.clear_cache()
+
+        if self._component_handlers:
+            for archetype in self._archetypes.values():
+                for row, entity in enumerate(archetype.entities):
+                    self._components_added(
+                        entity,
+                        {
+                            component_type: column[row]
+                            for component_type, column in archetype.columns.items()
+                        },
+                    )
+
+    @property
+    def last_entity_id(self) -> int:
+        """The most recently created Entity ID."""
+        return self._next_entity_id
+
+    def add_processor(
+        self, processor_instance: Processor, priority=0, group: Any = None
+    ) -> None:
         """Add a Processor instance to the World.
 
         All processors should subclass :py:class:`esper.Processor`.
         An optional priority argument can be provided. A higher
         priority will be executed first when :py:meth:`esper.World.process`
         is called.
+
+        An optional group can also be provided, so that a subset of the
+        Processors can be run with :py:meth:`esper.World.process_group`.
         """
         processor_instance.priority = priority
+        processor_instance.group = group
         processor_instance.world = self
         self._processors.append(processor_instance)
         self._processors.sort(key=lambda proc: proc.priority, reverse=True)
@@ -245,21 +631,63 @@ class World:
 
         entity = self._next_entity_id
 
-        for component_instance in components:
-            component_type = type(component_instance)
+        if components:
+            components_by_type = {
+                type(component_instance): component_instance
+                for component_instance in components
+            }
+
+            self._move_entity(
+                entity,
+                self._get_archetype(frozenset(components_by_type)),
+                components_by_type,
+            )
+
+            if self._component_handlers:
+                self._components_added(entity, components_by_type)
 
-            if component_type not in self._components:
-                self._components[component_type] = set()
+        return entity
 
-            self._components[component_type].add(entity)
+    def create_entities(self, batch: _Iterable[_Iterable[_C]]) -> _List[int]:
+        """Create many Entities at once, each with its own Components.
 
-            if entity not in self._entities:
-                self._entities[entity] = {}
+        Works like calling :py:meth:`esper.World.create_entity` for each item
+        of the batch, returning their Entity IDs in order, except that
+        Component handlers are called after all Entities exist.
+        """
+        entities = []
 
-            self._entities[entity][component_type] = component_instance
-            self.clear_cache()
+        for components in batch:
+            self._next_entity_id += 1
+            entities.append((self._next_entity_id, components))
 
-        return entity
+        self._create_entities(entities)
+
+        return [entity for entity, _ in entities]
+
+    def _create_entities(self, batch: _List[_Tuple[int, _Iterable[_C]]]) -> None:
+        added = []
+
+        for entity, components in batch:
+            components_by_type = {
+                type(component_instance): component_instance
+                for component_instance in components
+            }
+
+            if not components_by_type:
+                continue
+
+            self._move_entity(
+                entity,
+                self._get_archetype(frozenset(components_by_type)),
+                components_by_type,
+            )
+
+            added.append((entity, components_by_type))
+
+        if self._component_handlers:
+            for entity, components_by_type in added:
+                self._components_added(entity, components_by_type)
 
     def delete_entity(self, entity: int, immediate: bool = False) -> None:
         """Delete an Entity from the World.
@@ -274,14 +702,11 @@ class World:
         Raises a KeyError if the given entity does not exist in the database.
         """
         if immediate:
-            for component_type in self._entities[entity]:
-                self._components[component_type].discard(entity)
-
-                if not self._components[component_type]:
-                    del self._components[component_type]
+            archetype = self._entities.pop(entity)
+            components = archetype.pop(entity)
 
-            del self._entities[entity]
-            self.clear_cache()
+            if self._component_handlers:
+                self._components_removed(entity, components)
 
         else:
             self._dead_entities.add(entity)
@@ -294,6 +719,25 @@ class World:
         """
         return entity in self._entities and entity not in self._dead_entities
 
+    def entity_count(self) -> int:
+        """Count the Entities that have at least one Component."""
+        return len(self._entities)
+
+    def component_counts(self) -> dict:
+        """Count the Entities having each Component type, by type."""
+        counts = {}
+
+        for archetype in self._archetypes.values():
+            if not archetype.entities:
+                continue
+
+            for component_type in archetype.signature:
+                counts[component_type] = counts.get(component_type, 0) + len(
+                    archetype.entities
+                )
+
+        return counts
+
     def component_for_entity(self, entity: int, component_type: _Type[_C]) -> _C:
         """Retrieve a Component instance for a specific Entity.
 
@@ -303,7 +747,8 @@ class World:
 
         Raises a KeyError if the given Entity and Component do not exist.
         """
-        return self._entities[entity][component_type]
+        archetype = self._entities[entity]
+        return archetype.columns[component_type][archetype.rows[entity]]
 
     def components_for_entity(self, entity: int) -> _Tuple[_C, ...]:
         """Retrieve all Components for a specific Entity, as a Tuple.
@@ -316,15 +761,17 @@ class World:
 
         Raises a KeyError if the given entity does not exist in the database.
         """
-        return tuple(self._entities[entity].values())
+        archetype = self._entities[entity]
+        row = archetype.rows[entity]
+        return tuple(column[row] for column in archetype.columns.values())
 
     def has_component(self, entity: int, component_type: _Type[_C]) -> bool:
         """Check if an Entity has a specific Component type."""
-        return component_type in self._entities[entity]
+        return component_type in self._entities[entity].signature
 
     def has_components(self, entity: int, *component_types: _Type[_C]) -> bool:
         """Check if an Entity has all the specified Component types."""
-        return all(comp_type in self._entities[entity] for comp_type in component_types)
+        return self._entities[entity].signature.issuperset(component_types)
 
     def add_component(
         self,
@@ -343,16 +790,38 @@ class World:
         """
         component_type = type_alias or type(component_instance)
 
-        if component_type not in self._components:
-            self._components[component_type] = set()
+        archetype = self._entities.get(entity)
+
+        if archetype is None:
+            self._move_entity(
+                entity,
+                self._get_archetype(frozenset((component_type,))),
+                {component_type: component_instance},
+            )
 
-        self._components[component_type].add(entity)
+        elif component_type in archetype.signature:
+            previous_instance = archetype.replace(
+                entity, component_type, component_instance
+            )
 
-        if entity not in self._entities:
-            self._entities[entity] = {}
+            if component_type in self._component_handlers:
+                self._components_removed(entity, {component_type: previous_instance})
 
-        self._entities[entity][component_type] = component_instance
-        self.clear_cache()
+        else:
+            try:
+                next_archetype = archetype.edges[component_type]
+            except KeyError:
+                next_archetype = archetype.edges[component_type] = self._get_archetype(
+                    archetype.signature | {component_type}
+                )
+
+            components = archetype.pop(entity)
+
+            components[component_type] = component_instance
+            self._move_entity(entity, next_archetype, components)
+
+        if component_type in self._component_handlers:
+            self._components_added(entity, {component_type: component_instance})
 
     def remove_component(self, entity: int, component_type: _Type[_C]) -> int:
         """Remove a Component instance from an Entity, by type.
@@ -364,83 +833,35 @@ class World:
         Raises a KeyError if either the given entity or Component type does
         not exist in the database.
         """
-        self._components[component_type].discard(entity)
+        archetype = self._entities[entity]
 
-        if not self._components[component_type]:
-            del self._components[component_type]
+        if component_type not in archetype.signature:
+            raise KeyError(component_type)
 
-        del self._entities[entity][component_type]
+        components = archetype.pop(entity)
 
-        if not self._entities[entity]:
-            del self._entities[entity]
-
-        self.clear_cache()
-        return entity
+        component_instance = components.pop(component_type)
 
-    def _get_component(self, component_type: _Type[_C]) -> _Iterable[_Tuple[int, _C]]:
-        entity_db = self._entities
+        if components:
+            try:
+                next_archetype = archetype.edges[component_type]
+            except KeyError:
+                next_archetype = archetype.edges[component_type] = self._get_archetype(
+                    archetype.signature - {component_type}
+                )
 
-        for entity in self._components.get(component_type, []):
-            yield entity, entity_db[entity][component_type]
-
-    @overload
-    def _get_components(
-        self,
-        __ct1: _Type[C1],
-        __ct2: _Type[C2],
-    ) -> _Iterable[_Tuple[int, _Tuple[C1, C2]]]:
-        pass
-
-    @overload
-    def _get_components(
-        self,
-        __ct1: _Type[C1],
-        __ct2: _Type[C2],
-        __ct3: _Type[C3],
-    ) -> _Iterable[_Tuple[int, _Tuple[C1, C2, C3]]]:
-        pass
-
-    @overload
-    def _get_components(
-        self,
-        __ct1: _Type[C1],
-        __ct2: _Type[C2],
-        __ct3: _Type[C3],
-        __ct4: _Type[C4],
-    ) -> _Iterable[_Tuple[int, _Tuple[C1, C2, C3, C4]]]:
-        pass
-
-    @overload
-    def _get_components(
-        self,
-        __ct1: _Type[C1],
-        __ct2: _Type[C2],
-        __ct3: _Type[C3],
-        __ct4: _Type[C4],
-        __ct5: _Type[C5],
-    ) -> _Iterable[_Tuple[int, _Tuple[C1, C2, C3, C4, C5]]]:
-        pass
+            self._move_entity(entity, next_archetype, components)
+        else:
+            del self._entities[entity]
 
-    def _get_components(
-        self, *component_types: _Type[object]
-    ) -> _Iterable[_Tuple[int, Any]]:
-        entity_db = self._entities
-        comp_db = self._components
+        if component_type in self._component_handlers:
+            self._components_removed(entity, {component_type: component_instance})
 
-        try:
-            for entity in set.intersection(*[comp_db[ct] for ct in component_types]):
-                yield entity, tuple(entity_db[entity][ct] for ct in component_types)
-        except KeyError:
-            pass
+        return entity
 
     def get_component(self, component_type: _Type[_C]) -> _List[_Tuple[int, _C]]:
         """Get an iterator for Entity, Component pairs."""
-        try:
-            return self._get_component_cache[component_type]
-        except KeyError:
-            return self._get_component_cache.setdefault(
-                component_type, list(self._get_component(component_type))
-            )
+        return self._query(component_type, (component_type,), True)
 
     @overload
     def get_components(
@@ -484,12 +905,7 @@ class World:
         self, *component_types: _Type[object]
     ) -> _List[_Tuple[int, Any]]:
         """Get an iterator for Entity and multiple Component sets."""
-        try:
-            return self._get_components_cache[component_types]
-        except KeyError:
-            return self._get_components_cache.setdefault(
-                component_types, list(self._get_components(*component_types))
-            )
+        return self._query(component_types, component_types, False)
 
     def try_component(self, entity: int, component_type: _Type[_C]) -> _Optional[_C]:
         """Try to get a single component type for an Entity.
@@ -499,8 +915,9 @@ class World:
         that may or may not exist, without having to first query if the Entity
         has the Component type.
         """
-        if component_type in self._entities[entity]:
-            return self._entities[entity][component_type]
+        archetype = self._entities[entity]
+        if component_type in archetype.signature:
+            return archetype.columns[component_type][archetype.rows[entity]]
         return None
 
     @overload
@@ -555,8 +972,10 @@ class World:
         that may or may not exist, without first having to query if the Entity
         has the Component types.
         """
-        if all(comp_type in self._entities[entity] for comp_type in component_types):
-            return [self._entities[entity][comp_type] for comp_type in component_types]
+        archetype = self._entities[entity]
+        if archetype.signature.issuperset(component_types):
+            row = archetype.rows[entity]
+            return [archetype.columns[comp_type][row] for comp_type in component_types]
         return None
 
     def _clear_dead_entities(self):
@@ -567,28 +986,86 @@ class World:
         be duplicated here as well.
         """
         for entity in self._dead_entities:
-            for component_type in self._entities[entity]:
-                self._components[component_type].discard(entity)
+            archetype = self._entities.pop(entity)
+            components = archetype.pop(entity)
 
-                if not self._components[component_type]:
-                    del self._components[component_type]
-
-            del self._entities[entity]
+            if self._component_handlers:
+                self._components_removed(entity, components)
 
         self._dead_entities.clear()
-        self.clear_cache()
 
-    def _process(self, *args, **kwargs):
-        for processor in self._processors:
+    def flush_commands(self) -> None:
+        """Apply the commands queued on :py:attr:`esper.World.commands`, in order.
+
+        Runs of queued creates are made in one batch, like
+        :py:meth:`esper.World.create_entities`. Entities created by the same
+        commands count as live even while they have no Components, so
+        Components can be added to them afterwards. Other commands for
+        Entities no longer in the database are skipped, as are removals of
+        Components an Entity no longer has. Commands queued by Component
+        handlers meanwhile are left for the next flush.
+        """
+        commands = self.commands._commands
+
+        if not commands:
+            return
+
+        self.commands._commands = []
+
+        creates = []
+        created = set()
+
+        for kind, entity, argument in commands:
+            if kind == _CREATE_ENTITY:
+                creates.append((entity, argument))
+                created.add(entity)
+                continue
+
+            if creates:
+                self._create_entities(creates)
+                creates = []
+
+            archetype = self._entities.get(entity)
+
+            if kind == _ADD_COMPONENT:
+                if archetype is not None or entity in created:
+                    self.add_component(entity, *argument)
+            elif kind == _REMOVE_COMPONENT:
+                if archetype is not None and argument in archetype.signature:
+                    self.remove_component(entity, argument)
+            else:
+                created.discard(entity)
+
+                if archetype is not None:
+                    self._dead_entities.discard(entity)
+                    self.delete_entity(entity, immediate=True)
+
+        if creates:
+            self._create_entities(creates)
+
+    def _process(self, processors, *args, **kwargs):
+        for processor in processors:
             processor.process(*args, **kwargs)
 
-    def _timed_process(self, *args, **kwargs):
+            if self.commands._commands:
+                self.flush_commands()
+
+    def _timed_process(self, processors, *args, **kwargs):
         """Track Processor execution time for benchmarking."""
-        for processor in self._processors:
-            start_time = _time.process_time()
+        for processor in processors:
+            start_time = _time.perf_counter_ns()
             processor.process(*args, **kwargs)
-            process_time = int(round((_time.process_time() - start_time) * 1000, 2))
-            self.process_times[processor.__class__.__name__] = process_time
+
+            if self.commands._commands:
+                self.flush_commands()
+
+            process_time = _time.perf_counter_ns() - start_time
+
+            name = processor.__class__.__name__
+            self.process_times[name] = int(round(process_time / 1_000_000, 2))
+
+            if self.profiler is not None:
+                self.profiler.record(name, process_time)
 
     def process(self, *args, **kwargs):
         """Call the process method on all Processors, in order of their priority.
@@ -599,4 +1076,18 @@ class World:
         at the start of this call.
         """
         self._clear_dead_entities()
-        self._process(*args, **kwargs)
+        self._process(self._processors, *args, **kwargs)
+
+    def process_group(self, group: Any, *args, **kwargs):
+        """Call the process method on the Processors of a single group.
+
+        Like :py:meth:`esper.World.process`, but only the Processors that were
+        added with the given group are run, in order of their priority.
+        Entities marked for deletion are also deleted at the start of this call.
+        """
+        self._clear_dead_entities()
+        self._process(
+            [processor for processor in self._processors if processor.group == group],
+            *args,
+            **kwargs,
+        )
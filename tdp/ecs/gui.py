@@ -8,14 +8,17 @@ from tdp.constants import GUI_WIDTH, GUI_HEIGHT, GUI_X_OFFSET, GUI_Y_OFFSET
 from .statsrepo import StatsRepo
 from .components import PlayerInputMachine, PlayerResearch, TurretMachine
 from .enums import (
+    GameSpeed,
     ResearchKind,
     TurretKind,
     TurretUpgradeablePropertyKind,
     enabled_turret_kinds,
 )
 from .resources import (
+    GAME_SPEED_NAMES,
     RESEARCH_NAMES,
     TURRET_SELL_REWARD,
+    TURRET_TARGET_PRIORITY_NAMES,
     TURRET_TO_RESEARCH,
     TURRET_UPGRADE_COSTS,
     TURRET_NAMES,
@@ -49,6 +52,7 @@ class GuiElements:
         TurretUpgradeablePropertyKind, pygame_gui.elements.UIButton
     ]
 
+    selected_turret_target_priority_button: pygame_gui.elements.UIButton
     selected_turret_sell_button: pygame_gui.elements.UIButton
 
     research_buttons: dict[ResearchKind, pygame_gui.elements.UIButton]
@@ -59,6 +63,8 @@ class GuiElements:
     game_over_score_label: pygame_gui.elements.UILabel
     game_over_main_menu_button: pygame_gui.elements.UIButton
 
+    game_speed_button: pygame_gui.elements.UIButton
+
 
 def build_gui(manager: pygame_gui.UIManager, stats_repo: StatsRepo) -> GuiElements:
     panel = pygame_gui.elements.UIPanel(
@@ -202,7 +208,7 @@ def build_gui(manager: pygame_gui.UIManager, stats_repo: StatsRepo) -> GuiElemen
         previous_research_button = research_button
 
     selected_turret_panel = pygame_gui.elements.UIPanel(
-        relative_rect=pygame.Rect((10, 10), (panel_width, 150)),
+        relative_rect=pygame.Rect((10, 10), (panel_width, 180)),
         container=panel,
         manager=manager,
         anchors={"top_target": research_panel},
@@ -267,6 +273,14 @@ def build_gui(manager: pygame_gui.UIManager, stats_repo: StatsRepo) -> GuiElemen
 
         previous_upgradeable_property_container = selected_turret_property_container
 
+    selected_turret_target_priority_button = pygame_gui.elements.UIButton(
+        relative_rect=pygame.Rect((0, 4), (subpanel_width, 24)),
+        text="Target: ?",
+        manager=manager,
+        container=selected_turret_panel,
+        anchors={"top_target": previous_upgradeable_property_container},
+    )
+
     selected_turret_sell_turret_button = pygame_gui.elements.UIButton(
         relative_rect=pygame.Rect((0, -24), (subpanel_width, 24)),
         text="Recycle ($?)",
@@ -303,6 +317,14 @@ def build_gui(manager: pygame_gui.UIManager, stats_repo: StatsRepo) -> GuiElemen
         anchors={"top_target": game_over_score_label},
     )
 
+    game_speed_button = pygame_gui.elements.UIButton(
+        relative_rect=pygame.Rect((10, -48), (panel_width, 30)),
+        text=f"Speed: {GAME_SPEED_NAMES[GameSpeed.Normal]}",
+        manager=manager,
+        container=panel,
+        anchors={"bottom": "bottom"},
+    )
+
     # TODO quit button
 
     # TODO pause button
@@ -328,6 +350,7 @@ def build_gui(manager: pygame_gui.UIManager, stats_repo: StatsRepo) -> GuiElemen
         selected_turret_name_label=selected_turret_name_label,
         selected_turret_property_labels=selected_turret_property_labels,
         selected_turret_property_upgrade_buttons=selected_turret_property_upgrade_buttons,
+        selected_turret_target_priority_button=selected_turret_target_priority_button,
         selected_turret_sell_button=selected_turret_sell_turret_button,
         research_buttons=research_buttons,
         current_research_label=current_research_label,
@@ -335,6 +358,7 @@ def build_gui(manager: pygame_gui.UIManager, stats_repo: StatsRepo) -> GuiElemen
         game_over_window=game_over_window,
         game_over_score_label=game_over_score_label,
         game_over_main_menu_button=game_over_main_menu_button,
+        game_speed_button=game_speed_button,
     )
 
 
@@ -358,6 +382,10 @@ def sync_selected_turret_gui(
         f"{TURRET_NAMES[turret.kind]} Turret"
     )
 
+    gui_elements.selected_turret_target_priority_button.set_text(
+        f"Target: {TURRET_TARGET_PRIORITY_NAMES[turret.target_priority]}"
+    )
+
     gui_elements.selected_turret_sell_button.set_text(
         f"Recycle (${TURRET_SELL_REWARD})"
     )
@@ -421,3 +449,7 @@ def sync_research_gui(world: esper.World, player: int, gui_elements: GuiElements
         # nothing in progress
         gui_elements.current_research_progress.set_current_progress(0.0)
         gui_elements.current_research_label.set_text("Idle")
+
+
+def sync_game_speed_gui(game_speed: GameSpeed, gui_elements: GuiElements):
+    gui_elements.game_speed_button.set_text(f"Speed: {GAME_SPEED_NAMES[game_speed]}")
@@ -0,0 +1,173 @@
+import dataclasses
+import itertools
+import logging
+import pathlib
+
+from tdp.constants import FIXED_TICK_DELTA
+
+from .assets import Assets, load_assets
+from .components import PlayerInputMachine, TurretBuildZone
+from .entities import (
+    create_bullet_turret,
+    create_flame_turret,
+    create_frost_turret,
+    create_lightning_turret,
+    create_player,
+    create_poison_turret,
+    create_rocket_turret,
+    create_tornado_turret,
+)
+from .enums import PlayerInputState, ProcessorGroup, TurretKind
+from .profiling import Profiler
+from .recording import InputRecorder
+from .snapshot import load_snapshot
+from .statsrepo import StatsRepo, load_stats_repo
+from .types import PlayerAction
+from .world import build_world
+
+from . import esper
+
+logger = logging.getLogger(__name__)
+
+
+TURRET_CREATORS = {
+    TurretKind.Bullet: create_bullet_turret,
+    TurretKind.Flame: create_flame_turret,
+    TurretKind.Rocket: create_rocket_turret,
+    TurretKind.Frost: create_frost_turret,
+    TurretKind.Lightning: create_lightning_turret,
+    TurretKind.Poison: create_poison_turret,
+    TurretKind.Tornado: create_tornado_turret,
+}
+
+
+@dataclasses.dataclass
+class HeadlessGame:
+    """
+    A game world without display, gui or rendering, advanced tick by tick
+    as fast as the cpu allows
+    """
+
+    world: esper.World
+    player: int
+
+    assets: Assets
+    stats_repo: StatsRepo
+
+    ticks: int = 0
+
+    profiler: Profiler | None = None
+    input_recorder: InputRecorder | None = None
+
+    @property
+    def game_over(self) -> bool:
+        player_input_machine = self.world.component_for_entity(
+            self.player, PlayerInputMachine
+        )
+
+        return player_input_machine.state == PlayerInputState.GameOver
+
+    def tick(
+        self,
+        player_input_events: list | None = None,
+        player_actions: list[PlayerAction] | None = None,
+    ):
+        self.world.process_group(
+            ProcessorGroup.Logic,
+            delta=FIXED_TICK_DELTA,
+            assets=self.assets,
+            player_input_events=player_input_events or [],
+            scripted_player_actions=player_actions,
+            input_recorder=self.input_recorder,
+            player=self.player,
+            stats_repo=self.stats_repo,
+        )
+
+        if self.profiler is not None:
+            self.profiler.end_frame(self.world)
+
+        self.ticks += 1
+
+
+def build_headless_game(
+    map_name: str,
+    *,
+    seed: int | None = None,
+    assets: Assets | None = None,
+    stats_repo: StatsRepo | None = None,
+    profiler: Profiler | None = None,
+    input_recorder: InputRecorder | None = None,
+) -> HeadlessGame:
+    """
+    Assets and stats repo can be passed in to share them across many games,
+    image loading does not need a display
+    """
+    world = build_world(map_name, seed=seed, headless=True, profiler=profiler)
+
+    return HeadlessGame(
+        world=world,
+        player=create_player(world),
+        assets=assets or load_assets(),
+        stats_repo=stats_repo or load_stats_repo(),
+        profiler=profiler,
+        input_recorder=input_recorder,
+    )
+
+
+def place_turrets(
+    game: HeadlessGame,
+    turret_layout: tuple[TurretKind, ...],
+    *,
+    max_turrets: int | None = None,
+):
+    """
+    Builds turrets for free, cycling through the layout over the map's build
+    zones in map order; an empty layout leaves them be
+    """
+    if not turret_layout:
+        return
+
+    build_zones = [ent for ent, _ in game.world.get_component(TurretBuildZone)]
+
+    for build_zone_ent, turret_kind in zip(
+        build_zones[:max_turrets], itertools.cycle(turret_layout)
+    ):
+        TURRET_CREATORS[turret_kind](
+            game.world, build_zone_ent, assets=game.assets, stats_repo=game.stats_repo
+        )
+
+
+def load_headless_game(
+    snapshot_path: pathlib.Path,
+    *,
+    assets: Assets | None = None,
+    stats_repo: StatsRepo | None = None,
+    profiler: Profiler | None = None,
+) -> HeadlessGame:
+    """
+    Continues a saved game, rendered or headless, from where it was saved
+    """
+    assets = assets or load_assets()
+
+    snapshot = load_snapshot(
+        snapshot_path, assets=assets, headless=True, profiler=profiler
+    )
+
+    return HeadlessGame(
+        world=snapshot.world,
+        player=snapshot.player,
+        assets=assets,
+        stats_repo=stats_repo or load_stats_repo(),
+        ticks=snapshot.ticks,
+        profiler=profiler,
+        input_recorder=snapshot.input_recorder,
+    )
+
+
+def run_headless_game(game: HeadlessGame, *, max_ticks: int) -> HeadlessGame:
+    while game.ticks < max_ticks and not game.game_over:
+        game.tick()
+
+    logger.info("Headless game stopped after %d ticks", game.ticks)
+
+    return game
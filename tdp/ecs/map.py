@@ -1,19 +1,28 @@
+import functools
+import heapq
 import logging
+import math
 
-from pygame import Rect, Vector2
+from pygame import Rect, Surface, Vector2
+from pytmx import TiledMap, TiledObject
 from pytmx.util_pygame import load_pygame
 
 TILE_WIDTH, TILE_HEIGHT = 64, 64
 
 from .components import (
     Despawning,
-    PathGraph,
+    GameMap,
+    MapBackground,
+    MapTiles,
+    PathNetwork,
     Renderable,
     BoundingBox,
     Spawning,
+    SpawnPoint,
     TurretBuildZone,
 )
 from .enums import RenderableOrder, ObjectKind
+from .util import get_simulation_random
 from .waves import generate_random_waves
 
 from . import esper
@@ -21,33 +30,71 @@ from . import esper
 logger = logging.getLogger(__name__)
 
 
-def load_map(world: esper.World, map_name: str):
-    tiled_map = load_pygame(f"assets/maps/{map_name}.tdp.tmx")
+def get_map_path(map_name: str) -> str:
+    return f"assets/maps/{map_name}.tdp.tmx"
 
-    # base layer
-    base_layer = tiled_map.get_layer_by_name("Base")
 
-    for x, y, image in base_layer.tiles():
-        world.create_entity(
-            Renderable(
-                image=image,
-                order=RenderableOrder.Base,
-            ),
-            BoundingBox(rect=Rect(x * TILE_WIDTH, y * TILE_HEIGHT, 64, 64)),
-        )
+def load_map(world: esper.World, map_name: str, *, headless: bool = False):
+    map_path = get_map_path(map_name)
 
-    # environment layer
-    environment_layer = tiled_map.get_layer_by_name("Environment")
+    # the map's entity comes first either way, so entity ids and the player
+    # actions referring to them match between headless and rendered worlds,
+    # for replays
+    if headless:
+        # tile images can only be converted with a display, and are only
+        # needed for drawing, so headless worlds skip them entirely
+        world.create_entity(GameMap(name=map_name))
 
-    for x, y, image in environment_layer.tiles():
-        world.create_entity(
-            Renderable(
-                image=image,
-                order=RenderableOrder.Environment,
-            ),
-            BoundingBox(rect=Rect(x * TILE_WIDTH, y * TILE_HEIGHT, 64, 64)),
+        load_map_objects(world, read_tiled_map(map_path), headless=True)
+        return
+
+    tiled_map = load_pygame(map_path)
+
+    world.create_entity(GameMap(name=map_name), *load_map_images(tiled_map))
+
+    load_map_objects(world, tiled_map)
+
+
+@functools.cache
+def read_tiled_map(map_path: str) -> TiledMap:
+    # only read from, so parsed once per process no matter how many
+    # headless games are built on it
+    return TiledMap(map_path)
+
+
+def load_map_images(tiled_map: TiledMap) -> tuple[MapBackground, MapTiles]:
+    return (
+        MapBackground(image=bake_tile_layers(tiled_map, ("Base", "Environment"))),
+        MapTiles(images=tiled_map.images),
+    )
+
+
+def bake_tile_layers(tiled_map: TiledMap, layer_names: tuple[str, ...]) -> Surface:
+    """
+    Draws the static tile layers, bottom to top, onto a single surface so
+    they are blitted in one call per frame rather than one entity per tile
+    """
+    background = Surface((tiled_map.width * TILE_WIDTH, tiled_map.height * TILE_HEIGHT))
+
+    # same as the screen fill, for any tiles left empty
+    background.fill((255, 255, 255))
+
+    for layer_name in layer_names:
+        layer = tiled_map.get_layer_by_name(layer_name)
+
+        background.blits(
+            [
+                (image, (x * TILE_WIDTH, y * TILE_HEIGHT))
+                for x, y, image in layer.tiles()
+            ],
+            doreturn=False,
         )
 
+    # no per-pixel alpha left after baking, fastest to blit
+    return background.convert()
+
+
+def load_map_objects(world: esper.World, tiled_map: TiledMap, *, headless=False):
     # object layer
     object_layer = tiled_map.get_layer_by_name("Objects")
 
@@ -56,41 +103,183 @@ def load_map(world: esper.World, map_name: str):
         obj for obj in object_layer if obj.type == ObjectKind.TurretBuildZone
     ]
 
+    build_zones = []
+
     for obj in turret_spawns:
-        world.create_entity(
-            Renderable(
-                image=obj.image,
-                order=RenderableOrder.Objects,
-            ),
-            BoundingBox(rect=Rect(obj.x, obj.y, obj.width, obj.height)),
-            TurretBuildZone(),
+        bbox = BoundingBox(rect=Rect(obj.x, obj.y, obj.width, obj.height))
+
+        if headless:
+            build_zones.append((bbox, TurretBuildZone()))
+            continue
+
+        build_zones.append(
+            (
+                Renderable(
+                    image=obj.image,
+                    order=RenderableOrder.Objects,
+                ),
+                bbox,
+                TurretBuildZone(),
+            )
         )
 
+    world.create_entities(build_zones)
+
     ## pathing
     pathings = [obj for obj in object_layer if obj.type == ObjectKind.Path]
 
-    start_obj = next(obj for obj in pathings if obj.name == "PathStart")
-    end_obj = next(obj for obj in pathings if obj.name == "PathEnd")
+    network, start_objs, end_objs = build_path_network(pathings)
+
+    world.create_entities(
+        (
+            Despawning(),
+            BoundingBox(rect=Rect(end_obj.x, end_obj.y, end_obj.width, end_obj.height)),
+        )
+        for end_obj in end_objs
+    )
+
+    spawn_points = [
+        [
+            BoundingBox(rect=Rect(start_obj.x, start_obj.y, 0, 0)),
+            SpawnPoint(network=network, vertex=vertex),
+        ]
+        for start_obj, vertex in start_objs
+    ]
 
-    end_bbox = BoundingBox(
-        rect=Rect(end_obj.x, end_obj.y, end_obj.width, end_obj.height)
+    # one wave schedule for the whole map, whatever the number of spawns
+    spawn_points[0].append(
+        Spawning(waves=generate_random_waves(get_simulation_random(world)))
     )
 
-    world.create_entity(Despawning(), end_bbox)
+    world.create_entities(spawn_points)
 
-    ### vertex objs are ordered by index
-    ### TODO build graph dynamically from vertex obj -> next property
-    vertex_objs = [obj for obj in pathings if obj not in (start_obj, end_obj)]
 
-    vertices: list[Vector2] = [
-        Vector2(obj.x, obj.y)
-        for obj in sorted(vertex_objs, key=lambda v: v.properties["index"])
+def next_object_ids(obj: TiledObject) -> list[int]:
+    # any object property named next..., one per branch
+    return [value for name, value in obj.properties.items() if name.startswith("next")]
+
+
+def build_path_network(
+    pathings: list[TiledObject],
+) -> tuple[PathNetwork, list[tuple[TiledObject, int]], list[TiledObject]]:
+    """
+    Routing tables over the map's path objects, from every PathStart to any
+    PathEnd. Objects link to the next ones with object properties named
+    next..., and a branch is taken in proportion to the weight property of
+    the object it leads to. Maps without links have a single path, through
+    the objects in order of their index property.
+
+    Returns the network, with the start objects and their vertex, and the
+    end objects.
+    """
+    start_objs = [obj for obj in pathings if obj.name == "PathStart"]
+    end_objs = [obj for obj in pathings if obj.name == "PathEnd"]
+
+    # units walk to the center of an end
+    vertices = [
+        Vector2(Rect(obj.x, obj.y, obj.width, obj.height).center)
+        if obj in end_objs
+        else Vector2(obj.x, obj.y)
+        for obj in pathings
+    ]
+
+    vertex_by_id = {obj.id: vertex for vertex, obj in enumerate(pathings)}
+
+    edges: list[list[tuple[int, float]]] = [[] for _ in pathings]
+
+    if any(next_object_ids(obj) for obj in pathings):
+        for vertex, obj in enumerate(pathings):
+            for next_id in next_object_ids(obj):
+                next_vertex = vertex_by_id[next_id]
+
+                edges[vertex].append(
+                    (next_vertex, pathings[next_vertex].properties.get("weight", 1.0))
+                )
+    else:
+        start_objs, end_objs = start_objs[:1], end_objs[:1]
+
+        ordered = [
+            *start_objs,
+            *sorted(
+                (obj for obj in pathings if obj.name not in ("PathStart", "PathEnd")),
+                key=lambda v: v.properties["index"],
+            ),
+            *end_objs,
+        ]
+
+        for obj, next_obj in zip(ordered, ordered[1:]):
+            edges[vertex_by_id[obj.id]].append((vertex_by_id[next_obj.id], 1.0))
+
+    exits = {vertex_by_id[obj.id] for obj in end_objs}
+
+    # shortest distances to an exit, over the edges reversed
+    previous: list[list[int]] = [[] for _ in pathings]
+
+    for vertex, next_hops in enumerate(edges):
+        for next_vertex, _ in next_hops:
+            previous[next_vertex].append(vertex)
+
+    distance_to_exit = [math.inf] * len(pathings)
+    queue = [(0.0, vertex) for vertex in sorted(exits)]
+
+    while queue:
+        distance, vertex = heapq.heappop(queue)
+
+        if distance >= distance_to_exit[vertex]:
+            continue
+
+        distance_to_exit[vertex] = distance
+
+        for previous_vertex in previous[vertex]:
+            heapq.heappush(
+                queue,
+                (
+                    distance + vertices[previous_vertex].distance_to(vertices[vertex]),
+                    previous_vertex,
+                ),
+            )
+
+    # branches that can't reach an exit are never taken, and exits end routes
+    next_hops = [
+        []
+        if vertex in exits
+        else [
+            (next_vertex, weight)
+            for next_vertex, weight in edges[vertex]
+            if distance_to_exit[next_vertex] < math.inf
+        ]
+        for vertex in range(len(pathings))
     ]
 
-    vertices.append(Vector2(end_bbox.rect.centerx, end_bbox.rect.centery))
+    for start_obj in start_objs:
+        if distance_to_exit[vertex_by_id[start_obj.id]] == math.inf:
+            raise ValueError(f"PathStart id={start_obj.id} does not lead to a PathEnd")
 
-    world.create_entity(
-        Spawning(waves=generate_random_waves()),
-        BoundingBox(rect=Rect(start_obj.x, start_obj.y, 0, 0)),
-        PathGraph(vertices=vertices),
+    # routes are only walked when units spawn, a loop would never end
+    in_degrees = [0] * len(pathings)
+
+    for vertex_next_hops in next_hops:
+        for next_vertex, _ in vertex_next_hops:
+            in_degrees[next_vertex] += 1
+
+    ready = [vertex for vertex, degree in enumerate(in_degrees) if not degree]
+
+    while ready:
+        for next_vertex, _ in next_hops[ready.pop()]:
+            in_degrees[next_vertex] -= 1
+
+            if not in_degrees[next_vertex]:
+                ready.append(next_vertex)
+
+    if looped := [
+        pathings[vertex].id for vertex, degree in enumerate(in_degrees) if degree
+    ]:
+        raise ValueError(f"Path loops back on itself, on or after ids={looped}")
+
+    network = PathNetwork(
+        vertices=vertices,
+        next_hops=next_hops,
+        distance_to_exit=distance_to_exit,
     )
+
+    return network, [(obj, vertex_by_id[obj.id]) for obj in start_objs], end_objs
@@ -0,0 +1,259 @@
+import logging
+
+import numpy as np
+from pygame import Vector2
+
+from .components import (
+    BoundingBox,
+    PathGraph,
+    UnitPathing,
+    Velocity,
+    VelocityAdjustment,
+)
+from .enums import VelocityAdjustmentKind
+
+from . import esper
+
+logger = logging.getLogger(__name__)
+
+
+class MovingBodies:
+    """
+    Positions and velocities of every entity with a Velocity and
+    BoundingBox, and distances along the path of those following one, as
+    parallel arrays indexed by slot, kept up to date as either component
+    comes and goes. Removing an entity swaps the last slot into its place,
+    so slots stay contiguous.
+
+    While an entity moves its position lives here, unrounded, and is
+    written back to its bounding box every tick for collisions and
+    rendering, rounded to whole pixels for the rect. Entities not following
+    a path keep the unrounded position on their bounding box too, to be
+    picked up again when a snapshot is restored. Path followers move by
+    their speed along the path, and are placed by looking up their distance
+    along it.
+    """
+
+    def __init__(self, world: esper.World, capacity: int = 64) -> None:
+        self.world = world
+
+        self.entities: list[int] = []
+        self.slots: dict[int, int] = {}
+
+        self.velocities: list[Velocity] = []
+        self.bboxes: list[BoundingBox] = []
+        self.pathings: list[UnitPathing | None] = []
+
+        # every path followed so far, followers refer to them by index
+        self.paths: list[PathGraph] = []
+        self.path_indexes: dict[int, int] = {}
+
+        self.position = np.zeros((capacity, 2))
+        self.velocity = np.zeros((capacity, 2))
+        self.follows_path = np.zeros(capacity, dtype=bool)
+        # the rest are unused for entities not following a path
+        self.path = np.zeros(capacity, dtype=int)
+        self.distance = np.zeros(capacity)
+        self.speed = np.zeros(capacity)
+
+        for ent, vel in world.get_component(Velocity):
+            self.add(ent, vel)
+
+        # an entity is tracked once it has both, in whichever order they
+        # come, and a replaced bounding box is tracked anew
+        world.set_component_handler(Velocity, self.add, self.remove)
+        world.set_component_handler(BoundingBox, self.add, self.remove)
+
+    def __len__(self) -> int:
+        return len(self.entities)
+
+    def _grow(self):
+        capacity = 2 * len(self.follows_path)
+
+        for name in (
+            "position",
+            "velocity",
+            "follows_path",
+            "path",
+            "distance",
+            "speed",
+        ):
+            array = getattr(self, name)
+            grown = np.zeros((capacity, *array.shape[1:]), dtype=array.dtype)
+            grown[: len(array)] = array
+
+            setattr(self, name, grown)
+
+    def _path_index(self, path: PathGraph) -> int:
+        if (index := self.path_indexes.get(id(path))) is None:
+            index = self.path_indexes[id(path)] = len(self.paths)
+            self.paths.append(path)
+
+        return index
+
+    def add(self, ent: int, component: Velocity | BoundingBox):
+        if ent in self.slots:
+            return
+
+        vel = self.world.try_component(ent, Velocity)
+        bbox = self.world.try_component(ent, BoundingBox)
+
+        if vel is None or bbox is None:
+            return
+
+        slot = len(self.entities)
+
+        if slot == len(self.follows_path):
+            self._grow()
+
+        pathing = self.world.try_component(ent, UnitPathing)
+
+        self.slots[ent] = slot
+        self.entities.append(ent)
+        self.velocities.append(vel)
+        self.bboxes.append(bbox)
+        self.pathings.append(pathing)
+
+        self.position[slot] = (
+            bbox.rect.center if bbox.unrounded_center is None else bbox.unrounded_center
+        )
+        self.velocity[slot] = vel.vec
+        self.follows_path[slot] = pathing is not None
+
+        if pathing is not None:
+            self.path[slot] = self._path_index(pathing.path)
+            self.distance[slot] = pathing.distance
+            self.speed[slot] = vel.vec.magnitude()
+            self.position[slot] = pathing.position
+            self.velocity[slot] = pathing.direction * self.speed[slot]
+
+    def remove(self, ent: int, component: Velocity | BoundingBox):
+        if (slot := self.slots.pop(ent, None)) is None:
+            return
+
+        last = len(self.entities) - 1
+
+        if slot != last:
+            last_ent = self.entities[last]
+
+            self.slots[last_ent] = slot
+            self.entities[slot] = last_ent
+            self.velocities[slot] = self.velocities[last]
+            self.bboxes[slot] = self.bboxes[last]
+            self.pathings[slot] = self.pathings[last]
+
+            self.position[slot] = self.position[last]
+            self.velocity[slot] = self.velocity[last]
+            self.follows_path[slot] = self.follows_path[last]
+            self.path[slot] = self.path[last]
+            self.distance[slot] = self.distance[last]
+            self.speed[slot] = self.speed[last]
+
+        self.entities.pop()
+        self.velocities.pop()
+        self.bboxes.pop()
+        self.pathings.pop()
+
+    def speed_factors(self, delta: float) -> np.ndarray:
+        """
+        How much dynamic adjustments from e.g. status effects scale each
+        velocity by, ageing the adjustments as well. Few entities have any,
+        so only those are handled one by one.
+        """
+        factors = np.ones(len(self))
+
+        for slot, vel in enumerate(self.velocities):
+            if not vel.adjustments:
+                continue
+
+            for adjustment in vel.adjustments.values():
+                match adjustment:
+                    case VelocityAdjustment(kind=VelocityAdjustmentKind.Immobile):
+                        factors[slot] = 0.0
+                    case VelocityAdjustment(
+                        kind=VelocityAdjustmentKind.Slowdown, factor=factor
+                    ):
+                        factors[slot] *= factor
+
+            for adjustment_kind, adjustment in list(vel.adjustments.items()):
+                adjustment.elapsed += delta
+
+                if adjustment.expired:
+                    del vel.adjustments[adjustment_kind]
+
+        return factors
+
+    def _path_groups(self, followers: np.ndarray):
+        """
+        Followers by the path they follow, usually all on one
+        """
+        if len(self.paths) == 1:
+            yield self.paths[0], followers
+            return
+
+        paths = self.path[followers]
+
+        for index in np.unique(paths).tolist():
+            yield self.paths[index], followers[paths == index]
+
+    def move(self, delta: float):
+        count = len(self)
+
+        if not count:
+            return
+
+        follows_path = self.follows_path[:count]
+        factors = self.speed_factors(delta)
+
+        (followers,) = np.nonzero(follows_path)
+        (others,) = np.nonzero(~follows_path)
+
+        if len(others):
+            self.position[others] += (
+                self.velocity[others] * (factors[others] * delta)[:, None]
+            )
+
+            for slot, (x, y) in zip(others.tolist(), self.position[others].tolist()):
+                self.bboxes[slot].unrounded_center = (x, y)
+
+        if len(followers):
+            for path, slots in self._path_groups(followers):
+                distance = self.distance[slots] + (
+                    self.speed[slots] * factors[slots] * delta
+                )
+                np.minimum(distance, path.length, out=distance)
+
+                self.distance[slots] = distance
+                self.position[slots] = path.positions_at(distance)
+
+            for slot, distance in zip(
+                followers.tolist(), self.distance[followers].tolist()
+            ):
+                self.pathings[slot].distance = distance
+
+        for bbox, center in zip(self.bboxes, np.rint(self.position[:count]).tolist()):
+            bbox.rect.center = center
+
+    def steer(self):
+        """
+        Points path followers' velocity along the path segment they're on,
+        keeping speed
+        """
+        (followers,) = np.nonzero(self.follows_path[: len(self)])
+
+        if not len(followers):
+            return
+
+        for path, slots in self._path_groups(followers):
+            direction = path.directions[path.segments_at(self.distance[slots])]
+            velocity = direction * self.speed[slots][:, None]
+
+            # units keep the same velocity along a whole segment
+            (changed,) = np.nonzero(np.any(velocity != self.velocity[slots], axis=1))
+
+            self.velocity[slots] = velocity
+
+            for slot, vec in zip(slots[changed].tolist(), velocity[changed].tolist()):
+                # orient towards the next vertex
+                self.velocities[slot].vec = Vector2(vec)
+                self.bboxes[slot].rotation = Vector2(vec)
@@ -0,0 +1,167 @@
+from collections import defaultdict, deque
+import csv
+import dataclasses
+import json
+import logging
+import pathlib
+
+from . import esper
+
+logger = logging.getLogger(__name__)
+
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_samples: list[int], p: float) -> int:
+    # nearest rank
+    index = min(len(sorted_samples) - 1, int(len(sorted_samples) * p / 100.0))
+
+    return sorted_samples[index]
+
+
+@dataclasses.dataclass
+class ProcessorStats:
+    name: str
+
+    # in milliseconds, over the rolling window
+    p50: float
+    p95: float
+    p99: float
+
+
+@dataclasses.dataclass
+class Profiler:
+    """
+    Collects processor timings from a timed world, summed per frame, with
+    rolling percentiles over the last `window` frames and the full history
+    kept for dumping
+    """
+
+    window: int = 300
+
+    frame: int = 0
+
+    # processor name -> nanoseconds spent so far in the current frame
+    current: dict[str, int] = dataclasses.field(default_factory=dict)
+
+    # processor name -> per-frame nanoseconds, over the rolling window
+    samples: defaultdict[str, deque[int]] = dataclasses.field(init=False)
+
+    entity_count: int = 0
+    component_counts: dict[str, int] = dataclasses.field(default_factory=dict)
+
+    frames: list[dict] = dataclasses.field(default_factory=list)
+
+    def __post_init__(self):
+        self.samples = defaultdict(lambda: deque(maxlen=self.window))
+
+    def attach(self, world: esper.World):
+        """
+        World has to be created with `timed=True`
+        """
+        world.profiler = self
+
+    def record(self, name: str, process_time: int):
+        # groups run more than once per frame when logic catches up
+        self.current[name] = self.current.get(name, 0) + process_time
+
+    def end_frame(self, world: esper.World):
+        for name, process_time in self.current.items():
+            self.samples[name].append(process_time)
+
+        self.entity_count = world.entity_count()
+        self.component_counts = {
+            component_type.__name__: count
+            for component_type, count in world.component_counts().items()
+        }
+
+        self.frames.append(
+            {
+                "frame": self.frame,
+                "entities": self.entity_count,
+                "processors": self.current,
+                "components": self.component_counts,
+            }
+        )
+
+        self.current = {}
+        self.frame += 1
+
+    def stats(self) -> list[ProcessorStats]:
+        """
+        Slowest processors first, by p95
+        """
+        stats = []
+
+        for name, samples in self.samples.items():
+            sorted_samples = sorted(samples)
+
+            p50, p95, p99 = (
+                percentile(sorted_samples, p) / 1_000_000.0 for p in PERCENTILES
+            )
+
+            stats.append(ProcessorStats(name=name, p50=p50, p95=p95, p99=p99))
+
+        return sorted(stats, key=lambda stat: stat.p95, reverse=True)
+
+    def dump(self, path: pathlib.Path):
+        """
+        Writes a `.csv` with one row per frame, or `.json` with the rolling
+        percentiles and every frame, depending on the suffix
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        match path.suffix:
+            case ".csv":
+                self.dump_csv(path)
+            case ".json":
+                self.dump_json(path)
+            case _:
+                raise ValueError(f"Unsupported profile dump format: {path}")
+
+        logger.info("Dumped %d profiled frames to %s", len(self.frames), path)
+
+    def dump_csv(self, path: pathlib.Path):
+        processor_names = sorted(
+            {name for frame in self.frames for name in frame["processors"]}
+        )
+        component_names = sorted(
+            {name for frame in self.frames for name in frame["components"]}
+        )
+
+        with path.open("w", newline="") as f:
+            writer = csv.writer(f)
+
+            writer.writerow(
+                [
+                    "frame",
+                    "entities",
+                    *(f"{name}_ns" for name in processor_names),
+                    *(f"{name}_count" for name in component_names),
+                ]
+            )
+
+            for frame in self.frames:
+                writer.writerow(
+                    [
+                        frame["frame"],
+                        frame["entities"],
+                        *(frame["processors"].get(name, 0) for name in processor_names),
+                        *(frame["components"].get(name, 0) for name in component_names),
+                    ]
+                )
+
+    def dump_json(self, path: pathlib.Path):
+        with path.open("w") as f:
+            json.dump(
+                {
+                    "percentiles_ms": {
+                        stat.name: {"p50": stat.p50, "p95": stat.p95, "p99": stat.p99}
+                        for stat in self.stats()
+                    },
+                    "frames": self.frames,
+                },
+                f,
+                indent=2,
+            )
@@ -0,0 +1,30 @@
+import dataclasses
+
+from .types import PlayerAction
+
+
+@dataclasses.dataclass
+class InputRecorder:
+    """
+    Player actions resolved on each logic tick. Together with the world's
+    seed they reproduce a game exactly, when fed back in as scripted player
+    actions on the same ticks.
+
+    Actions are recorded rather than raw input events, since button presses
+    carry live gui elements and clicks only mean something against the
+    world state they hit.
+    """
+
+    tick: int = 0
+
+    # only ticks with any actions
+    actions: dict[int, list[PlayerAction]] = dataclasses.field(default_factory=dict)
+
+    def record(self, player_actions: list[PlayerAction]):
+        """
+        Called once per logic tick, even without any actions
+        """
+        if player_actions:
+            self.actions[self.tick] = [dict(action) for action in player_actions]
+
+        self.tick += 1
@@ -1,30 +1,225 @@
-from collections import defaultdict
+import functools
+
 import pygame
+import pygame_gui
+
+from tdp.constants import ROTATION_ANGLE_STEP, ROTATION_CACHE_SIZE
+from tdp.ecs.enums import RenderableExtraOrder, RenderableOrder
+
+from .components import BoundingBox, Renderable
+from .profiling import Profiler
+from . import esper
+
+
+def rotation_angle(rotation: pygame.Vector2) -> float:
+    """
+    Angle in degrees a sprite is drawn at for a rotation, snapped to whole
+    steps so rotated images can be reused
+    """
+    angle = rotation.angle_to(pygame.Vector2())
+
+    return round(angle / ROTATION_ANGLE_STEP) * ROTATION_ANGLE_STEP % 360.0
+
+
+@functools.lru_cache(maxsize=ROTATION_CACHE_SIZE)
+def rotate_image(image: pygame.Surface, angle: float) -> pygame.Surface:
+    # unrotated sprites keep their image, which also keeps them from looking
+    # changed to the dirty rect tracking
+    if angle == 0.0:
+        return image
+
+    return pygame.transform.rotate(image, angle)
+
+
+HEALTH_BAR_WIDTH, HEALTH_BAR_HEIGHT = 32, 4
+
+STATUS_EFFECT_BAR_WIDTH, STATUS_EFFECT_BAR_HEIGHT = 80, 14
 
-from tdp.ecs.enums import RenderableExtraOrder
 
-from .components import BoundingBox, Renderable, RenderableExtra
+@functools.cache
+def render_health_bar(filled_width: int) -> pygame.Surface:
+    """
+    Health bar filled `filled_width` pixels of the way, shared by every
+    enemy at that health
+    """
+    image = pygame.Surface((HEALTH_BAR_WIDTH, HEALTH_BAR_HEIGHT), pygame.SRCALPHA)
 
+    image.fill("#ff0006", pygame.Rect(0, 0, filled_width, HEALTH_BAR_HEIGHT))
 
-def render_simple(screen: pygame.Surface, renderable: Renderable, bbox: BoundingBox):
-    screen.blit(renderable.image, bbox.rect.topleft)
+    return image
 
 
-def render_composite(screen: pygame.Surface, renderable: Renderable, bbox: BoundingBox):
-    order_map: defaultdict[RenderableExtraOrder, list[RenderableExtra]] = defaultdict(
-        list
+@functools.lru_cache(maxsize=64)
+def render_status_effect_bar(
+    icons: tuple[tuple[pygame.Surface, int], ...]
+) -> pygame.Surface:
+    """
+    Status effect strip with each active effect's icon at its x offset,
+    shared by every enemy with the same effects
+    """
+    image = pygame.Surface(
+        (STATUS_EFFECT_BAR_WIDTH, STATUS_EFFECT_BAR_HEIGHT), pygame.SRCALPHA
     )
 
-    for extra in renderable.extras.values():
-        order_map[extra.order].append(extra)
+    for icon, x in icons:
+        image.blit(icon, (x, 0))
+
+    return image
+
+
+def interpolation_offset(bbox: BoundingBox, alpha: float) -> tuple[int, int]:
+    """
+    Offset from the current position to where a moving entity is drawn,
+    `alpha` of the way from its previous logic tick to the current one
+    """
+    if bbox.previous_center is None:
+        return 0, 0
+
+    x, y = bbox.rect.center
+    previous_x, previous_y = bbox.previous_center
+
+    return (
+        round((previous_x - x) * (1.0 - alpha)),
+        round((previous_y - y) * (1.0 - alpha)),
+    )
+
+
+def renderable_blits(
+    renderable: Renderable,
+    bbox: BoundingBox,
+    offset: tuple[int, int] = (0, 0),
+) -> list[tuple[pygame.Surface, pygame.Rect]]:
+    """
+    Surfaces an entity is drawn with and where, in drawing order
+    """
+    if not renderable.composite:
+        return [(renderable.image, bbox.rect.move(offset))]
+
+    extras = renderable.extras.values()
+
+    return [
+        # draw underneath first
+        *(
+            (extra.image, extra.rect.move(offset))
+            for extra in extras
+            if extra.order == RenderableExtraOrder.Under
+        ),
+        # draw core object
+        (renderable.image, bbox.rect.move(offset)),
+        # draw over last
+        *(
+            (extra.image, extra.rect.move(offset))
+            for extra in extras
+            if extra.order == RenderableExtraOrder.Over
+        ),
+    ]
+
+
+class RenderQueue:
+    """
+    Renderable entities bucketed by order, in the order they were added,
+    kept up to date as Renderable components come and go so drawing never
+    has to sort. A Renderable's order is expected to stay the same once it
+    is added.
+    """
+
+    def __init__(self, world: esper.World) -> None:
+        # buckets are drawn in RenderableOrder order
+        self.buckets: dict[RenderableOrder, dict[int, Renderable]] = {
+            order: {} for order in sorted(RenderableOrder)
+        }
+
+        for ent, renderable in world.get_component(Renderable):
+            self.add(ent, renderable)
+
+        world.set_component_handler(Renderable, self.add, self.remove)
+
+    def add(self, ent: int, renderable: Renderable):
+        self.buckets[renderable.order][ent] = renderable
+
+    def remove(self, ent: int, renderable: Renderable):
+        self.buckets[renderable.order].pop(ent, None)
+
+    def __iter__(self):
+        for bucket in self.buckets.values():
+            yield from bucket.items()
+
+
+def same_blits(
+    blits: list[tuple[pygame.Surface, pygame.Rect]],
+    other_blits: list[tuple[pygame.Surface, pygame.Rect]],
+) -> bool:
+    # images are swapped for new surfaces rather than drawn on, so identity
+    # is enough to tell whether they changed
+    return len(blits) == len(other_blits) and all(
+        image is other_image and rect == other_rect
+        for (image, rect), (other_image, other_rect) in zip(blits, other_blits)
+    )
+
+
+def render_profile_overlay(
+    font: pygame.font.Font, profiler: Profiler, *, max_lines: int = 12
+) -> pygame.Surface:
+    """
+    Entity count and the slowest processors' p50 / p95 / p99 frame times
+    """
+    lines = [
+        f"entities {profiler.entity_count}",
+        *(
+            f"{stat.name.removesuffix('Processor')} "
+            f"{stat.p50:.2f} / {stat.p95:.2f} / {stat.p99:.2f} ms"
+            for stat in profiler.stats()[:max_lines]
+        ),
+    ]
+
+    line_images = [font.render(line, True, pygame.Color(0, 0, 0)) for line in lines]
+
+    line_height = font.get_linesize()
+
+    overlay = pygame.Surface(
+        (
+            max(line_image.get_width() for line_image in line_images),
+            line_height * len(line_images),
+        ),
+        pygame.SRCALPHA,
+    )
+
+    # keeps the text readable over the map
+    overlay.fill((255, 255, 255, 192))
+
+    for i, line_image in enumerate(line_images):
+        overlay.blit(line_image, (0, i * line_height))
+
+    return overlay
+
+
+def gui_blits(
+    gui_manager: pygame_gui.UIManager,
+) -> dict[tuple[int, tuple[int, int, int, int]], tuple]:
+    """
+    What the gui draws, in drawing order, keyed by image and screen area.
+    Like renderables, elements swap their image for a new surface when they
+    change, so an element keeps its key for as long as it looks the same.
+    The area is the image's own, containers span their contents but draw
+    an empty image
+    """
+    blits = {}
+
+    for image, rect, area, special_flags in gui_manager.get_sprite_group().visible:
+        image_rect = image.get_rect(topleft=rect.topleft)
+
+        blits[(id(image), tuple(image_rect))] = (image, image_rect, area, special_flags)
+
+    return blits
 
-    # draw underneath first
-    for extra in order_map[RenderableExtraOrder.Under]:
-        screen.blit(extra.image, extra.rect.topleft)
 
-    # draw core object
-    screen.blit(renderable.image, bbox.rect.topleft)
+def restore_background(
+    screen: pygame.Surface,
+    background: pygame.Surface | None,
+    rect: pygame.Rect,
+):
+    if background is None or not background.get_rect().contains(rect):
+        screen.fill((255, 255, 255), rect)
 
-    # draw over last
-    for extra in order_map[RenderableExtraOrder.Over]:
-        screen.blit(extra.image, extra.rect.topleft)
+    if background is not None:
+        screen.blit(background, rect, area=rect)
@@ -0,0 +1,172 @@
+import dataclasses
+import gzip
+import hashlib
+import json
+import logging
+import pathlib
+
+from .assets import Assets
+from .components import SimulationRandom
+from .enums import (
+    PlayerActionKind,
+    ResearchKind,
+    TurretKind,
+    TurretTargetPriority,
+    TurretUpgradeablePropertyKind,
+)
+from .headless import HeadlessGame, build_headless_game
+from .profiling import Profiler
+from .recording import InputRecorder
+from .statsrepo import StatsRepo, load_stats_repo
+from .types import PlayerAction
+
+from . import esper
+
+logger = logging.getLogger(__name__)
+
+
+REPLAY_VERSION = 1
+
+# how each player action field is read back, json only keeps the raw values
+PLAYER_ACTION_FIELD_TYPES = {
+    "kind": PlayerActionKind,
+    "ent": int,
+    "turret_kind": TurretKind,
+    "turret_property": TurretUpgradeablePropertyKind,
+    "research_kind": ResearchKind,
+    "target_priority": TurretTargetPriority,
+}
+
+
+@dataclasses.dataclass
+class Replay:
+    """
+    Everything needed to re-simulate a game tick for tick
+    """
+
+    map_name: str
+    seed: int
+
+    # a replay only plays back the same with the same stats
+    stats_repo_hash: str
+
+    # logic ticks the recorded game ran for
+    ticks: int
+
+    # only ticks with any actions
+    actions: dict[int, list[PlayerAction]] = dataclasses.field(default_factory=dict)
+
+
+def hash_stats_repo(stats_repo: StatsRepo) -> str:
+    return hashlib.sha256(
+        json.dumps(stats_repo, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+def build_replay(
+    world: esper.World,
+    map_name: str,
+    input_recorder: InputRecorder,
+    stats_repo: StatsRepo,
+) -> Replay:
+    simulation_random = world.get_component(SimulationRandom)[0][1]
+
+    return Replay(
+        map_name=map_name,
+        seed=simulation_random.seed,
+        stats_repo_hash=hash_stats_repo(stats_repo),
+        ticks=input_recorder.tick,
+        actions=dict(input_recorder.actions),
+    )
+
+
+def decode_player_action(data: dict) -> PlayerAction:
+    return {key: PLAYER_ACTION_FIELD_TYPES[key](value) for key, value in data.items()}
+
+
+def save_replay(replay: Replay, path: pathlib.Path):
+    """
+    Gzipped json, actions are few and far between so this stays small
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(
+            {
+                "version": REPLAY_VERSION,
+                "map": replay.map_name,
+                "seed": replay.seed,
+                "stats_repo_hash": replay.stats_repo_hash,
+                "ticks": replay.ticks,
+                # json object keys are always strings, keep ticks as ints
+                "actions": [
+                    [tick, player_actions]
+                    for tick, player_actions in sorted(replay.actions.items())
+                ],
+            },
+            f,
+            separators=(",", ":"),
+        )
+
+    logger.info("Saved replay of %d ticks to %s", replay.ticks, path)
+
+
+def load_replay(path: pathlib.Path) -> Replay:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        data = json.load(f)
+
+    if data["version"] != REPLAY_VERSION:
+        raise ValueError(f"Unsupported replay version {data['version']}: {path}")
+
+    return Replay(
+        map_name=data["map"],
+        seed=data["seed"],
+        stats_repo_hash=data["stats_repo_hash"],
+        ticks=data["ticks"],
+        actions={
+            tick: [decode_player_action(action) for action in player_actions]
+            for tick, player_actions in data["actions"]
+        },
+    )
+
+
+def check_replay_stats_repo(replay: Replay, stats_repo: StatsRepo) -> bool:
+    if replay.stats_repo_hash == hash_stats_repo(stats_repo):
+        return True
+
+    logger.warning(
+        "Replay was recorded with different stats, it will play back differently"
+    )
+
+    return False
+
+
+def play_replay_headless(
+    replay: Replay,
+    *,
+    assets: Assets | None = None,
+    stats_repo: StatsRepo | None = None,
+    profiler: Profiler | None = None,
+) -> HeadlessGame:
+    """
+    Re-simulates the whole replay as fast as the cpu allows
+    """
+    stats_repo = stats_repo or load_stats_repo()
+
+    check_replay_stats_repo(replay, stats_repo)
+
+    game = build_headless_game(
+        replay.map_name,
+        seed=replay.seed,
+        assets=assets,
+        stats_repo=stats_repo,
+        profiler=profiler,
+    )
+
+    # leaving the game over screen needs a display, the game is done by then
+    while game.ticks < replay.ticks and not game.game_over:
+        game.tick(player_actions=replay.actions.get(game.ticks))
+
+    logger.info("Replayed %d of %d ticks", game.ticks, replay.ticks)
+
+    return game
@@ -1,9 +1,22 @@
 from tdp.ecs.statsrepo import StatsRepo
 from .components import PlayerResources
-from .enums import ResearchKind, TurretKind, TurretUpgradeablePropertyKind
+from .enums import (
+    GameSpeed,
+    ResearchKind,
+    TurretKind,
+    TurretTargetPriority,
+    TurretUpgradeablePropertyKind,
+)
 from . import esper
 
 
+GAME_SPEED_NAMES: dict[GameSpeed, str] = {
+    GameSpeed.Normal: "1x",
+    GameSpeed.Fast: "2x",
+    GameSpeed.Faster: "4x",
+    GameSpeed.Max: "Max",
+}
+
 TURRET_NAMES: dict[TurretKind, str] = {
     TurretKind.Bullet: "Bullet",
     TurretKind.Flame: "Flame",
@@ -20,6 +33,14 @@ TURRET_UPGRADE_NAMES: dict[TurretUpgradeablePropertyKind, str] = {
     TurretUpgradeablePropertyKind.RateOfFire: "Freq",
 }
 
+TURRET_TARGET_PRIORITY_NAMES: dict[TurretTargetPriority, str] = {
+    TurretTargetPriority.Closest: "Closest",
+    TurretTargetPriority.Furthest: "Furthest",
+    TurretTargetPriority.LowestHealth: "Weakest",
+    TurretTargetPriority.HighestMaxHealth: "Strongest",
+    TurretTargetPriority.FirstAlongPath: "First",
+}
+
 TURRET_UPGRADE_COSTS: dict[TurretUpgradeablePropertyKind, int] = {
     TurretUpgradeablePropertyKind.Damage: 25,
     TurretUpgradeablePropertyKind.Range: 25,
@@ -0,0 +1,245 @@
+import copyreg
+import dataclasses
+import io
+import logging
+import pathlib
+import pickle
+import struct
+import zlib
+
+from pygame import Surface
+from pytmx.util_pygame import load_pygame
+
+from .assets import Assets
+from .components import MapBackground, MapTiles, PlayerInputMachine, Renderable
+from .entities import sync_selected_turret_range_extra_renderable
+from .enums import PlayerInputState
+from .map import get_map_path, load_map_images
+from .profiling import Profiler
+from .recording import InputRecorder
+from .systems import remove_game_over_systems
+from .world import create_world
+
+from . import esper
+
+logger = logging.getLogger(__name__)
+
+
+SNAPSHOT_MAGIC = b"TDPS"
+SNAPSHOT_VERSION = 1
+
+SNAPSHOT_HEADER = struct.Struct("<4sH")
+
+
+@dataclasses.dataclass
+class Snapshot:
+    map_name: str
+    world: esper.World
+    player: int
+
+    # logic ticks the game had run for when saved
+    ticks: int = 0
+
+    # carries on recording, so a replay of the loaded game still starts
+    # from the world's seed
+    input_recorder: InputRecorder | None = None
+
+
+def get_asset_surfaces(assets: Assets) -> dict[str, Surface]:
+    surfaces = {}
+
+    for field in dataclasses.fields(assets):
+        match getattr(assets, field.name):
+            case Surface() as surface:
+                surfaces[field.name] = surface
+            case list() as frames:
+                for index, frame in enumerate(frames):
+                    surfaces[f"{field.name}.{index}"] = frame
+            case dict() as surfaces_by_kind:
+                for kind, surface in surfaces_by_kind.items():
+                    surfaces[f"{field.name}.{kind}"] = surface
+
+    return surfaces
+
+
+def get_map_surfaces(
+    map_background: MapBackground, map_tiles: MapTiles
+) -> dict[str, Surface]:
+    surfaces = {"map_background": map_background.image}
+
+    for gid, image in enumerate(map_tiles.images):
+        if image is not None:
+            surfaces[f"map_tiles.{gid}"] = image
+
+    return surfaces
+
+
+def load_surface(key: str | None) -> Surface:
+    raise RuntimeError("Snapshot surfaces are only resolved by a SnapshotUnpickler")
+
+
+class SnapshotPickler(pickle.Pickler):
+    """
+    Saves surfaces as the key of the asset or map tile they were loaded
+    as. Any other surface is derived from those every frame, like rotated
+    images and health bars, and is saved as nothing at all.
+
+    Surfaces go through the dispatch table rather than `persistent_id`,
+    which would be called for every object pickled.
+    """
+
+    def __init__(self, file, surfaces: dict[str, Surface]):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+
+        self.surface_keys = {id(surface): key for key, surface in surfaces.items()}
+
+        self.dispatch_table = copyreg.dispatch_table.copy()
+        self.dispatch_table[Surface] = self.reduce_surface
+
+    def reduce_surface(self, surface: Surface):
+        return load_surface, (self.surface_keys.get(id(surface)),)
+
+
+class SnapshotUnpickler(pickle.Unpickler):
+    def __init__(self, file, surfaces: dict[str, Surface]):
+        super().__init__(file)
+
+        self.surfaces = surfaces
+
+        # redrawn before it is ever shown
+        self.empty_surface = Surface((0, 0))
+
+    def find_class(self, module: str, name: str):
+        if (module, name) == (__name__, load_surface.__name__):
+            return self.load_surface
+
+        return super().find_class(module, name)
+
+    def load_surface(self, key: str | None) -> Surface:
+        # map tiles are not loaded for headless worlds, nothing is drawn
+        return self.surfaces.get(key, self.empty_surface)
+
+
+def save_snapshot(
+    path: pathlib.Path,
+    world: esper.World,
+    *,
+    map_name: str,
+    assets: Assets,
+    ticks: int = 0,
+    input_recorder: InputRecorder | None = None,
+):
+    """
+    Pickles every entity and component, one column per component type
+    and archetype, compressed
+    """
+    surfaces = get_asset_surfaces(assets)
+
+    map_images = world.get_components(MapBackground, MapTiles)
+
+    for _, (map_background, map_tiles) in map_images:
+        surfaces |= get_map_surfaces(map_background, map_tiles)
+
+    data = io.BytesIO()
+
+    # read first on load, to know which map images to resolve surfaces to
+    pickle.dump(
+        {
+            "map": map_name,
+            # headless worlds have none of the renderables a display needs
+            "headless": not map_images,
+            "ticks": ticks,
+            "last_entity_id": world.last_entity_id,
+        },
+        data,
+        protocol=pickle.HIGHEST_PROTOCOL,
+    )
+
+    SnapshotPickler(data, surfaces).dump(
+        {
+            "tables": world.get_archetype_tables(),
+            "input_recorder": input_recorder,
+        }
+    )
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with path.open("wb") as f:
+        f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION))
+        # favour speed, it is saved while the game waits
+        f.write(zlib.compress(data.getbuffer(), 1))
+
+    logger.info("Saved snapshot of %d entities to %s", world.entity_count(), path)
+
+
+def load_snapshot(
+    path: pathlib.Path,
+    *,
+    assets: Assets,
+    headless: bool = False,
+    profiler: Profiler | None = None,
+) -> Snapshot:
+    """
+    Snapshots are pickles, only load ones from trusted sources
+    """
+    with path.open("rb") as f:
+        magic, version = SNAPSHOT_HEADER.unpack(f.read(SNAPSHOT_HEADER.size))
+
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot: {path}")
+
+        data = io.BytesIO(zlib.decompress(f.read()))
+
+    meta = pickle.load(data)
+
+    if meta["headless"] and not headless:
+        raise ValueError(f"Headless snapshots can only be loaded headless: {path}")
+
+    surfaces = get_asset_surfaces(assets)
+
+    if not headless:
+        surfaces |= get_map_surfaces(
+            *load_map_images(load_pygame(get_map_path(meta["map"])))
+        )
+
+    body = SnapshotUnpickler(data, surfaces).load()
+
+    world = create_world(headless=headless, profiler=profiler)
+
+    world.load_archetype_tables(body["tables"], meta["last_entity_id"])
+
+    player, player_input_machine = world.get_component(PlayerInputMachine)[0]
+
+    restore_derived_state(world, player_input_machine, headless=headless)
+
+    logger.info("Loaded snapshot of %d entities from %s", world.entity_count(), path)
+
+    return Snapshot(
+        map_name=meta["map"],
+        world=world,
+        player=player,
+        ticks=meta["ticks"],
+        input_recorder=body["input_recorder"],
+    )
+
+
+def restore_derived_state(
+    world: esper.World, player_input_machine: PlayerInputMachine, *, headless: bool
+):
+    """
+    Brings back what isn't saved, since it follows from the components
+    """
+    if player_input_machine.state == PlayerInputState.GameOver:
+        remove_game_over_systems(world)
+
+    if headless:
+        return
+
+    # rotated again on the next frame
+    for _, renderable in world.get_component(Renderable):
+        renderable.image = renderable.original_image
+
+    # the range ring is only drawn when the selection changes
+    sync_selected_turret_range_extra_renderable(
+        world, player_input_machine.selected_turret
+    )
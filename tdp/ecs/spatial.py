@@ -0,0 +1,190 @@
+from collections import defaultdict
+import dataclasses
+
+import numpy as np
+from pygame import Rect
+
+
+@dataclasses.dataclass
+class SpatialHashGrid:
+    """
+    Uniform grid over points, for radius lookups without scanning every
+    point. Built from an array of positions in one go, the points of each
+    cell being a contiguous run of one array of point indexes.
+    """
+
+    cell_size: int = 128
+
+    positions: np.ndarray = dataclasses.field(default_factory=lambda: np.zeros((0, 2)))
+
+    # point indexes sorted by cell, and the start and stop of each cell's run
+    order: np.ndarray = dataclasses.field(
+        default_factory=lambda: np.zeros(0, dtype=int)
+    )
+    cells: dict[tuple[int, int], tuple[int, int]] = dataclasses.field(
+        default_factory=dict
+    )
+
+    def build(self, positions: np.ndarray):
+        self.positions = positions
+
+        cells = np.floor_divide(positions, self.cell_size).astype(int)
+
+        # stable, so points keep their order within a cell
+        order = np.lexsort((cells[:, 1], cells[:, 0]))
+        cells = cells[order]
+
+        # a run starts wherever the cell changes
+        changed = np.ones(len(cells), dtype=bool)
+        changed[1:] = np.any(cells[1:] != cells[:-1], axis=1)
+
+        starts = np.flatnonzero(changed)
+        stops = np.append(starts[1:], len(order))
+
+        self.order = order
+        self.cells = {
+            (cx, cy): (start, stop)
+            for (cx, cy), start, stop in zip(
+                cells[starts].tolist(), starts.tolist(), stops.tolist()
+            )
+        }
+
+    def _runs(self, x: float, y: float, radius: float) -> list[np.ndarray]:
+        cells = self.cells
+        runs = []
+
+        for cx in range(
+            int((x - radius) // self.cell_size), int((x + radius) // self.cell_size) + 1
+        ):
+            for cy in range(
+                int((y - radius) // self.cell_size),
+                int((y + radius) // self.cell_size) + 1,
+            ):
+                if (run := cells.get((cx, cy))) is not None:
+                    runs.append(self.order[run[0] : run[1]])
+
+        return runs
+
+    def query_radius(self, pos: tuple[float, float], radius: float) -> np.ndarray:
+        """
+        Indexes of the points within the radius, cell by cell
+        """
+        runs = self._runs(*pos, radius)
+
+        if not runs:
+            return np.zeros(0, dtype=int)
+
+        candidates = np.concatenate(runs)
+        offsets = self.positions[candidates] - np.asarray(pos, dtype=float)
+
+        return candidates[np.sum(offsets * offsets, axis=1) <= radius * radius]
+
+    def pairs_in_range(
+        self, sources: np.ndarray, radii: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Every point within each source's radius, as parallel arrays of
+        source index, point index and squared distance. Only the points of
+        the cells around each source are measured.
+        """
+        runs = []
+        run_sources = []
+
+        for source, ((x, y), radius) in enumerate(
+            zip(sources.tolist(), radii.tolist())
+        ):
+            for run in self._runs(x, y, radius):
+                runs.append(run)
+                run_sources.append(source)
+
+        if not runs:
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int), np.zeros(0)
+
+        source_index = np.repeat(run_sources, [len(run) for run in runs])
+        point_index = np.concatenate(runs)
+
+        offsets = self.positions[point_index] - sources[source_index]
+        distance_sq = np.sum(offsets * offsets, axis=1)
+
+        in_range = distance_sq <= (radii * radii)[source_index]
+
+        return source_index[in_range], point_index[in_range], distance_sq[in_range]
+
+
+def best_in_range(
+    count: int,
+    source_index: np.ndarray,
+    point_index: np.ndarray,
+    distance_sq: np.ndarray,
+    scores: np.ndarray,
+) -> np.ndarray:
+    """
+    Index of the lowest scoring point of each of `count` sources, or -1 if
+    there is none, given the source and point pairs in range with their
+    squared distances and scores. Equal scores go to the closer point, then
+    the earlier one.
+    """
+    best = np.full(count, -1)
+
+    if not len(source_index):
+        return best
+
+    order = np.lexsort((point_index, distance_sq, scores, source_index))
+    sources = source_index[order]
+
+    # the first of each source's pairs is its best
+    first = np.concatenate(([True], sources[1:] != sources[:-1]))
+    best[sources[first]] = point_index[order][first]
+
+    return best
+
+
+@dataclasses.dataclass
+class RectHashGrid:
+    """
+    Uniform grid over entity rects, for overlap lookups without testing
+    every pair of rects
+    """
+
+    cell_size: int = 128
+
+    cells: defaultdict[tuple[int, int], list[tuple[int, Rect]]] = dataclasses.field(
+        default_factory=lambda: defaultdict(list)
+    )
+
+    def clear(self):
+        self.cells.clear()
+
+    def _cell_range(self, rect: Rect):
+        return (
+            range(rect.left // self.cell_size, rect.right // self.cell_size + 1),
+            range(rect.top // self.cell_size, rect.bottom // self.cell_size + 1),
+        )
+
+    def insert(self, ent: int, rect: Rect):
+        xs, ys = self._cell_range(rect)
+
+        for cx in xs:
+            for cy in ys:
+                self.cells[(cx, cy)].append((ent, rect))
+
+    def query(self, rect: Rect) -> list[int]:
+        xs, ys = self._cell_range(rect)
+
+        cells = self.cells
+
+        # rects spanning several cells are seen once per cell, dict keeps
+        # the first sighting in order
+        colliding: dict[int, None] = {}
+
+        for cx in xs:
+            for cy in ys:
+                # avoid get-or-create on the defaultdict for empty cells
+                if (cx, cy) not in cells:
+                    continue
+
+                for ent, other_rect in cells[(cx, cy)]:
+                    if ent not in colliding and rect.colliderect(other_rect):
+                        colliding[ent] = None
+
+        return list(colliding)
@@ -30,8 +30,8 @@ class StatsRepo(TypedDict):
     research: ResearchStats
 
 
-def load_stats_repo() -> StatsRepo:
-    with open("assets/statsrepo.toml", "rb") as f:
+def load_stats_repo(path: str = "assets/statsrepo.toml") -> StatsRepo:
+    with open(path, "rb") as f:
         stats_repo = tomllib.load(f)
 
     return stats_repo
@@ -1,5 +1,7 @@
 import logging
+import math
 
+import numpy as np
 import pygame
 import pygame.constants
 from pygame import Vector2, Rect
@@ -26,8 +28,10 @@ from .components import (
     Burning,
     DamagesEnemy,
     Enemy,
+    EnemyCollisions,
+    EnemySpatialIndex,
     Lifetime,
-    PathGraph,
+    MapBackground,
     PlayerInputMachine,
     PlayerResearch,
     PlayerResources,
@@ -37,8 +41,10 @@ from .components import (
     SpawnsEnemies,
     TimeToLive,
     TurretMachine,
+    TurretTarget,
     Velocity,
     Spawning,
+    SpawnPoint,
     Renderable,
     ScoreTracker,
     UnitPathing,
@@ -70,6 +76,7 @@ from .entities import (
 from .enums import (
     DamagesEnemyOnCollisionBehavior,
     PlayerInputState,
+    ProcessorGroup,
     RenderableExtraKind,
     RenderableExtraOrder,
     ScoreEventKind,
@@ -81,7 +88,24 @@ from .enums import (
     VelocityAdjustmentKind,
     VelocityAdjustmentSource,
 )
-from .rendering import render_composite, render_simple
+from .movement import MovingBodies
+from .profiling import Profiler
+from .recording import InputRecorder
+from .rendering import (
+    HEALTH_BAR_HEIGHT,
+    HEALTH_BAR_WIDTH,
+    RenderQueue,
+    gui_blits,
+    interpolation_offset,
+    render_health_bar,
+    render_profile_overlay,
+    render_status_effect_bar,
+    renderable_blits,
+    restore_background,
+    rotate_image,
+    rotation_angle,
+    same_blits,
+)
 from .resources import (
     player_has_resources_to_build_turret,
     player_has_resources_to_research,
@@ -90,42 +114,66 @@ from .resources import (
     subtract_resources_to_research,
     subtract_resources_to_upgrade_turret,
 )
+from .targeting import EnemyTargets, select_targets
 from .util import (
     get_player_action_for_button_press,
     get_player_action_for_click,
-    get_closest_enemy,
-    unit_pathing_to_path_graph,
+    get_simulation_random,
 )
 from . import esper
 
 logger = logging.getLogger(__name__)
 
 
-def add_systems(world: esper.World):
-    world.add_processor(SpawnsEnemiesProcessor())
-    world.add_processor(ResearchProcessor())
-    world.add_processor(PlayerResourcesProcessor())
-    world.add_processor(TurretStateProcessor())
-    world.add_processor(BuffetedProcessor())
-    world.add_processor(BurningProcessor())
-    world.add_processor(ShockedProcessor())
-    world.add_processor(PoisonedProcessor())
-    world.add_processor(EnemyStatusVisualEffectProcessor())
-    world.add_processor(TimeToLiveProcessor())
-    world.add_processor(MovementProcessor())
-
-    world.add_processor(SpawningProcessor())
-    world.add_processor(OutOfBoundsProcessor())
-    world.add_processor(DamagesEnemyProcessor())
-    world.add_processor(PlayerInputProcessor())
-    world.add_processor(ScoreTimeTrackerProcessor())
-    world.add_processor(LifetimeProcessor())
-    world.add_processor(PathingProcessor())
-    world.add_processor(DespawningProcessor())
-
-    world.add_processor(AnimationProcessor())
-    world.add_processor(RotationProcessor())
-    world.add_processor(RenderingProcessor())
+def add_systems(world: esper.World, *, headless: bool = False):
+    """
+    Logic processors advance the game by one fixed tick, render processors
+    draw and sync the gui once per display frame. Headless worlds only get
+    the logic processors, so they can run without a display, gui manager or
+    screen
+    """
+    logic, render = ProcessorGroup.Logic, ProcessorGroup.Render
+
+    moving_bodies = MovingBodies(world)
+    enemy_targets = EnemyTargets(world)
+
+    world.add_processor(InterpolationSnapshotProcessor(), group=logic)
+    world.add_processor(SpawnsEnemiesProcessor(), group=logic)
+    world.add_processor(ResearchProcessor(), group=logic)
+    world.add_processor(TurretTargetingProcessor(enemy_targets), group=logic)
+    world.add_processor(TurretStateProcessor(), group=logic)
+    world.add_processor(BuffetedProcessor(), group=logic)
+    world.add_processor(BurningProcessor(), group=logic)
+    world.add_processor(ShockedProcessor(), group=logic)
+    world.add_processor(PoisonedProcessor(), group=logic)
+    world.add_processor(TimeToLiveProcessor(), group=logic)
+    world.add_processor(MovementProcessor(moving_bodies), group=logic)
+
+    world.add_processor(SpawningProcessor(), group=logic)
+    world.add_processor(OutOfBoundsProcessor(), group=logic)
+    world.add_processor(EnemyBroadPhaseProcessor(), group=logic)
+    # after movement and spawning, so chain lightning finds enemies where
+    # they are this tick
+    world.add_processor(EnemySpatialIndexProcessor(enemy_targets), group=logic)
+    world.add_processor(DamagesEnemyProcessor(), group=logic)
+    world.add_processor(PlayerInputProcessor(), group=logic)
+    world.add_processor(ScoreTimeTrackerProcessor(), group=logic)
+    world.add_processor(LifetimeProcessor(), group=logic)
+    world.add_processor(PathingProcessor(moving_bodies), group=logic)
+    world.add_processor(DespawningProcessor(), group=logic)
+    world.add_processor(BoundingBoxRotationProcessor(), group=logic)
+
+    if headless:
+        return
+
+    world.add_processor(ResearchGuiProcessor(), group=render)
+    world.add_processor(PlayerResourcesProcessor(), group=render)
+    world.add_processor(WaveGuiProcessor(), group=render)
+
+    world.add_processor(EnemyStatusVisualEffectProcessor(), group=render)
+    world.add_processor(AnimationProcessor(), group=render)
+    world.add_processor(RotationProcessor(), group=render)
+    world.add_processor(RenderingProcessor(RenderQueue(world)), group=render)
 
 
 # TODO would like this in a different module
@@ -134,7 +182,7 @@ def remove_game_over_systems(world: esper.World):
     world.remove_processor(SpawningProcessor)
 
 
-def set_game_over(world: esper.World, gui_elements: GuiElements):
+def set_game_over(world: esper.World, gui_elements: GuiElements | None):
     remove_game_over_systems(world)
 
     # sync player state
@@ -142,6 +190,9 @@ def set_game_over(world: esper.World, gui_elements: GuiElements):
 
     player_input_machine.state = PlayerInputState.GameOver
 
+    if gui_elements is None:
+        return
+
     # sync ui
     score_tracker = world.get_component(ScoreTracker)[0][1]
 
@@ -150,38 +201,20 @@ def set_game_over(world: esper.World, gui_elements: GuiElements):
     gui_elements.game_over_window.show()
 
 
-class MovementProcessor(esper.Processor):
-    def process(self, *args, delta: float, **kwargs):
-        for _, (vel, bbox) in self.world.get_components(Velocity, BoundingBox):
-            velocity_vector = vel.vec.copy()
-
-            # dynamic adjustments from e.g. status effects
-            for adjustment in vel.adjustments.values():
-                match adjustment:
-                    case VelocityAdjustment(kind=VelocityAdjustmentKind.Immobile):
-                        velocity_vector.scale_to_length(0.0)
-                    case VelocityAdjustment(
-                        kind=VelocityAdjustmentKind.Slowdown, factor=factor
-                    ):
-                        velocity_vector.scale_to_length(
-                            velocity_vector.magnitude() * factor
-                        )
-
-            # update position
-            bbox.rect.centerx += velocity_vector.x * delta
-            bbox.rect.centery += velocity_vector.y * delta
+class InterpolationSnapshotProcessor(esper.Processor):
+    def process(self, *args, **kwargs):
+        for _, (_, bbox) in self.world.get_components(Velocity, BoundingBox):
+            bbox.previous_center = bbox.rect.center
 
-            # update adjustments
-            to_remove = []
 
-            for adjustment_kind, adjustment in vel.adjustments.items():
-                adjustment.elapsed += delta
+class MovementProcessor(esper.Processor):
+    def __init__(self, moving_bodies: MovingBodies) -> None:
+        super().__init__()
 
-                if adjustment.expired:
-                    to_remove.append(adjustment_kind)
+        self.moving_bodies = moving_bodies
 
-            for key in to_remove:
-                del vel.adjustments[key]
+    def process(self, *args, delta: float, **kwargs):
+        self.moving_bodies.move(delta)
 
 
 class SpawningProcessor(esper.Processor):
@@ -190,49 +223,60 @@ class SpawningProcessor(esper.Processor):
         *args,
         delta: float,
         stats_repo: StatsRepo,
-        gui_elements: GuiElements,
         assets,
         **kwargs,
     ):
-        # NOTE: only one spawn point at the moment
-        _, (spawning, bbox, path_graph) = self.world.get_components(
-            Spawning, BoundingBox, PathGraph
-        )[0]
+        spawn_points = self.world.get_components(BoundingBox, SpawnPoint)
 
-        wave = spawning.current_wave
+        for _, spawning in self.world.get_component(Spawning):
+            wave = spawning.current_wave
 
-        current_step = wave.current_step
+            current_step = wave.current_step
 
-        match current_step:
-            case {"kind": SpawningWaveStepKind.SpawnEnemy, "enemy_kind": enemy_kind}:
-                enemy = spawn_enemy(
-                    self.world,
-                    bbox,
-                    path_graph,
-                    enemy_kind,
-                    spawning.current_wave_index,
-                    stats_repo,
-                    assets,
-                )
+            match current_step:
+                case {
+                    "kind": SpawningWaveStepKind.SpawnEnemy,
+                    "enemy_kind": enemy_kind,
+                }:
+                    _, (bbox, spawn_point) = spawn_points[
+                        spawning.spawn_count % len(spawn_points)
+                    ]
+                    spawning.spawn_count += 1
 
-                wave.enemy_spawn_count += 1
-                wave.advance()
+                    enemy = spawn_enemy(
+                        self.world,
+                        bbox,
+                        spawn_point.network.route(
+                            spawn_point.vertex, get_simulation_random(self.world)
+                        ),
+                        enemy_kind,
+                        spawning.current_wave_index,
+                        stats_repo,
+                        assets,
+                    )
 
-                logger.info("Spawned new enemy id=%d", enemy)
+                    wave.enemy_spawn_count += 1
+                    wave.advance()
 
-            case {"kind": SpawningWaveStepKind.Wait, "duration": duration}:
-                wave.elapsed += delta
+                    logger.info("Spawned new enemy id=%d", enemy)
 
-                if wave.elapsed >= duration:
-                    wave.advance()
+                case {"kind": SpawningWaveStepKind.Wait, "duration": duration}:
+                    wave.elapsed += delta
+
+                    if wave.elapsed >= duration:
+                        wave.advance()
 
-        if wave.over:
-            spawning.advance()
+            if wave.over:
+                spawning.advance()
+
+
+class WaveGuiProcessor(esper.Processor):
+    def process(self, *args, gui_elements: GuiElements, **kwargs):
+        spawning = self.world.get_component(Spawning)[0][1]
 
-        # update ui
         gui_elements.wave_label.set_text(f"Wave {spawning.current_wave_num}")
 
-        gui_elements.wave_progress.set_current_progress(wave.progress)
+        gui_elements.wave_progress.set_current_progress(spawning.current_wave.progress)
 
 
 class SpawnsEnemiesProcessor(esper.Processor):
@@ -251,50 +295,232 @@ class SpawnsEnemiesProcessor(esper.Processor):
                 spawn_enemy(
                     self.world,
                     bbox,
-                    unit_pathing_to_path_graph(unit_pathing),
+                    unit_pathing.path,
                     spawns_enemies.kind,
                     spawning.current_wave_index,
                     stats_repo,
                     assets,
+                    path_distance=unit_pathing.distance,
                 )
 
                 spawns_enemies.elapsed = 0.0
 
 
 class RenderingProcessor(esper.Processor):
-    def __init__(self) -> None:
+    """
+    Redraws only the screen areas that changed since the last frame: where
+    entities and gui elements moved from and to, and the fps counter. The
+    whole screen is drawn on the first frame and in debug mode.
+    """
+
+    def __init__(self, render_queue: RenderQueue) -> None:
         super().__init__()
 
         self.font = pygame.font.SysFont("Comic", 40)
+        self.profile_font = pygame.font.SysFont("Comic", 16)
 
-    def process(self, *args, show_fps, screen, clock, debug, gui_manager, **kwargs):
-        screen.fill((255, 255, 255))
+        self.render_queue = render_queue
 
-        renderables = self.world.get_components(Renderable, BoundingBox)
+        # what each entity was drawn with last frame
+        self.drawn: dict[int, list[tuple[pygame.Surface, Rect]]] = {}
 
-        # sort by z-index to display in correct order
-        renderables = sorted(renderables, key=lambda item: item[1][0].order)
+        # what the gui drew last frame, see gui_blits
+        self.gui: dict[tuple, tuple] = {}
 
-        for _, (renderable, bbox) in renderables:
-            if renderable.composite:
-                render_composite(screen, renderable, bbox)
-            else:
-                render_simple(screen, renderable, bbox)
+        # areas the fps counter and profile were drawn over last frame
+        self.overlay_rects: list[Rect] = []
 
-            # render bounding box in debug mode
-            if debug:
-                pygame.draw.rect(screen, (0, 0, 0), bbox.rect, 2)
+        self.full_redraw = True
+
+    def process(
+        self,
+        *args,
+        show_fps,
+        screen,
+        clock,
+        debug,
+        gui_manager,
+        alpha: float = 1.0,
+        profiler: Profiler | None = None,
+        **kwargs,
+    ):
+        background = next(
+            (
+                background.image
+                for _, background in self.world.get_component(MapBackground)
+            ),
+            None,
+        )
+
+        # queue is already in z-order
+        drawn = {}
+
+        for ent, renderable in self.render_queue:
+            bbox = self.world.try_component(ent, BoundingBox)
+
+            if bbox is None:
+                continue
+
+            drawn[ent] = renderable_blits(
+                renderable, bbox, interpolation_offset(bbox, alpha)
+            )
+
+        gui = gui_blits(gui_manager)
+
+        fps_overlay = None
+        profile_overlay = None
+        overlay_rects = []
 
         if show_fps:
             fps_str = f"{clock.get_fps():.1f}"
 
             fps_overlay = self.font.render(fps_str, True, pygame.Color(0, 0, 0))
 
+            overlay_rects.append(fps_overlay.get_rect())
+
+        if profiler is not None:
+            profile_overlay = render_profile_overlay(self.profile_font, profiler)
+
+            ## beneath the fps counter
+            profile_overlay_rect = profile_overlay.get_rect()
+            profile_overlay_rect.top = self.font.get_linesize()
+
+            overlay_rects.append(profile_overlay_rect)
+
+        if self.full_redraw or debug:
+            screen.fill((255, 255, 255))
+
+            if background is not None:
+                screen.blit(background, (0, 0))
+
+            # one batched call, drawn keeps the sorted z-order
+            screen.blits(
+                [blit for blits in drawn.values() for blit in blits], doreturn=False
+            )
+
+            # render bounding boxes in debug mode
+            if debug:
+                for ent in drawn:
+                    bbox = self.world.component_for_entity(ent, BoundingBox)
+
+                    pygame.draw.rect(screen, (0, 0, 0), bbox.rect, 2)
+        else:
+            dirty_rects, gui_redraw = self.redraw_changed(
+                screen, background, drawn, gui, overlay_rects
+            )
+
+        if fps_overlay is not None:
             screen.blit(fps_overlay, (0, 0))
 
-        gui_manager.draw_ui(screen)
+        if profile_overlay is not None:
+            screen.blit(profile_overlay, profile_overlay_rect)
+
+        if self.full_redraw or debug:
+            gui_manager.draw_ui(screen)
+
+            pygame.display.flip()
+        else:
+            # the rest of the gui is still on screen from earlier frames
+            screen.blits(gui_redraw, doreturn=False)
+
+            pygame.display.update(dirty_rects)
+
+        # leaving debug mode has to clear the bounding boxes
+        self.full_redraw = bool(debug)
+
+        self.drawn = drawn
+        self.gui = gui
+        self.overlay_rects = overlay_rects
+
+    def redraw_changed(
+        self,
+        screen: pygame.Surface,
+        background: pygame.Surface | None,
+        drawn: dict[int, list[tuple[pygame.Surface, Rect]]],
+        gui: dict[tuple, tuple],
+        overlay_rects: list[Rect],
+    ) -> tuple[list[Rect], list[tuple]]:
+        """
+        Restores and redraws the dirty areas, returning them along with the
+        gui blits to draw over them, once the overlays are drawn
+        """
+        dirty_rects = [*self.overlay_rects, *overlay_rects]
+        redraw = set()
+
+        for ent, blits in drawn.items():
+            previous_blits = self.drawn.get(ent)
+
+            if previous_blits is not None and same_blits(blits, previous_blits):
+                continue
 
-        pygame.display.flip()
+            redraw.add(ent)
+            dirty_rects.extend(rect for _, rect in blits)
+
+            if previous_blits is not None:
+                dirty_rects.extend(rect for _, rect in previous_blits)
+
+        for ent, previous_blits in self.drawn.items():
+            if ent not in drawn:
+                dirty_rects.extend(rect for _, rect in previous_blits)
+
+        for key, (_, rect, _, _) in gui.items():
+            if key not in self.gui:
+                redraw.add(key)
+                dirty_rects.append(rect)
+
+        for key, (_, rect, _, _) in self.gui.items():
+            if key not in gui:
+                dirty_rects.append(rect)
+
+        # unchanged entities and gui overlapping a dirty area are drawn again
+        # in full, since translucent edges can't be drawn over themselves;
+        # which may in turn dirty more of the screen
+        rects = {ent: [rect for _, rect in blits] for ent, blits in drawn.items()}
+        rects.update((key, [rect]) for key, (_, rect, _, _) in gui.items())
+
+        candidates = [
+            (key, rect)
+            for key, key_rects in rects.items()
+            if key not in redraw
+            for rect in key_rects
+        ]
+        candidate_rects = [rect for _, rect in candidates]
+
+        new_dirty_rects = dirty_rects
+
+        while new_dirty_rects:
+            overlapping = {
+                candidates[index][0]
+                for dirty_rect in new_dirty_rects
+                for index in dirty_rect.collidelistall(candidate_rects)
+            } - redraw
+
+            new_dirty_rects = [rect for key in overlapping for rect in rects[key]]
+
+            redraw.update(overlapping)
+            dirty_rects.extend(new_dirty_rects)
+
+        # blitting the background at a rect hanging off the screen would
+        # shift it, so only the part on screen is restored and updated
+        screen_rect = screen.get_rect()
+        dirty_rects = [
+            clipped for rect in dirty_rects if (clipped := rect.clip(screen_rect))
+        ]
+
+        # most overlays and stationary entities cover the same area as last
+        # frame
+        dirty_rects = list({tuple(rect): rect for rect in dirty_rects}.values())
+
+        for rect in dirty_rects:
+            restore_background(screen, background, rect)
+
+        # one batched call, drawn keeps the sorted z-order
+        screen.blits(
+            [blit for ent, blits in drawn.items() if ent in redraw for blit in blits],
+            doreturn=False,
+        )
+
+        return dirty_rects, [blit for key, blit in gui.items() if key in redraw]
 
 
 class OutOfBoundsProcessor(esper.Processor):
@@ -309,47 +535,82 @@ class OutOfBoundsProcessor(esper.Processor):
                 self.world.delete_entity(ent)
 
 
+class EnemyBroadPhaseProcessor(esper.Processor):
+    def process(self, *args, **kwargs):
+        for _, enemy_collisions in self.world.get_component(EnemyCollisions):
+            grid = enemy_collisions.grid
+
+            grid.clear()
+
+            for enemy_ent, (_enemy, enemy_bbox) in self.world.get_components(
+                Enemy, BoundingBox
+            ):
+                grid.insert(enemy_ent, enemy_bbox.rect)
+
+            enemy_collisions.damages_enemy = {
+                damaging_ent: grid.query(damaging_bbox.rect)
+                for damaging_ent, (_, damaging_bbox) in self.world.get_components(
+                    DamagesEnemy, BoundingBox
+                )
+            }
+
+            # only a handful of despawn zones, test each against all rects at once
+            despawnables = self.world.get_components(Despawnable, BoundingBox)
+            despawnable_rects = [bbox.rect for _, (_, bbox) in despawnables]
+
+            enemy_collisions.despawning = {
+                despawn_ent: [
+                    despawnables[index][0]
+                    for index in despawn_bbox.rect.collidelistall(despawnable_rects)
+                ]
+                for despawn_ent, (_, despawn_bbox) in self.world.get_components(
+                    Despawning, BoundingBox
+                )
+            }
+
+
 # TODO refactor to EnemyCollisionProcessor
 # applying Damage is just another CollisionEffect
 class DamagesEnemyProcessor(esper.Processor):
     def process(self, *args, assets: Assets, stats_repo: StatsRepo, **kwargs):
-        for damaging_ent, (damages_enemy, damaging_bbox) in self.world.get_components(
+        enemy_collisions = self.world.get_component(EnemyCollisions)[0][1]
+
+        for damaging_ent, (damages_enemy, _) in self.world.get_components(
             DamagesEnemy, BoundingBox
         ):
             collided = False
 
-            for enemy_ent, (
-                enemy,
-                enemy_bbox,
-            ) in self.world.get_components(Enemy, BoundingBox):
-                if damaging_bbox.rect.colliderect(enemy_bbox.rect):
-                    logger.debug("Damaging entity id=%d", enemy_ent)
+            # candidates from the broad phase already overlap this entity
+            for enemy_ent in enemy_collisions.damages_enemy.get(damaging_ent, ()):
+                enemy = self.world.component_for_entity(enemy_ent, Enemy)
 
-                    collided = True
+                logger.debug("Damaging entity id=%d", enemy_ent)
 
-                    enemy.take_damage(damages_enemy.damage)
+                collided = True
 
-                    if enemy.is_dead:
-                        track_score_event(self.world, ScoreEventKind.EnemyKill)
+                enemy.take_damage(damages_enemy.damage)
 
-                        kill_enemy(
-                            self.world, enemy_ent, assets=assets, stats_repo=stats_repo
-                        )
-                    elif damages_enemy.applies_effects:
-                        apply_damage_effects_to_enemy(
-                            self.world, damaging_ent, enemy_ent, assets=assets
-                        )
+                if enemy.is_dead:
+                    track_score_event(self.world, ScoreEventKind.EnemyKill)
 
-                    if (
-                        damages_enemy.on_collision_behavior
-                        == DamagesEnemyOnCollisionBehavior.Pierce
-                    ):
-                        damages_enemy.pierced_count += 1
+                    kill_enemy(
+                        self.world, enemy_ent, assets=assets, stats_repo=stats_repo
+                    )
+                elif damages_enemy.applies_effects:
+                    apply_damage_effects_to_enemy(
+                        self.world, damaging_ent, enemy_ent, assets=assets
+                    )
 
-                        if damages_enemy.expired:
-                            self.world.delete_entity(damaging_ent)
+                if (
+                    damages_enemy.on_collision_behavior
+                    == DamagesEnemyOnCollisionBehavior.Pierce
+                ):
+                    damages_enemy.pierced_count += 1
 
-                            break
+                    if damages_enemy.expired:
+                        self.world.delete_entity(damaging_ent)
+
+                        break
 
             if collided:
                 match damages_enemy.on_collision_behavior:
@@ -366,7 +627,9 @@ class PlayerInputProcessor(esper.Processor):
         player: int,
         stats_repo: StatsRepo,
         assets: Assets,
-        gui_elements: GuiElements,
+        gui_elements: GuiElements | None = None,
+        scripted_player_actions: list[PlayerAction] | None = None,
+        input_recorder: InputRecorder | None = None,
         **kwargs,
     ):
         # TODO consider sorting by keydown, then keyup,
@@ -398,6 +661,13 @@ class PlayerInputProcessor(esper.Processor):
                     ):
                         player_actions.append(action)
 
+        # e.g. replayed from a recording, already resolved against the world
+        if scripted_player_actions:
+            player_actions.extend(scripted_player_actions)
+
+        if input_recorder is not None:
+            input_recorder.record(player_actions)
+
         acceptable_actions: dict[PlayerInputState, set[PlayerActionKind]] = {
             PlayerInputState.GameOver: {PlayerActionKind.ExitGame},
             PlayerInputState.Idle: {
@@ -408,6 +678,7 @@ class PlayerInputProcessor(esper.Processor):
             PlayerInputState.SelectingTurret: {
                 PlayerActionKind.SelectTurret,
                 PlayerActionKind.UpgradeTurretProperty,
+                PlayerActionKind.SetTurretTargetPriority,
                 PlayerActionKind.SetTurretToBuild,
                 PlayerActionKind.SellTurret,
                 PlayerActionKind.StartResearch,
@@ -483,6 +754,18 @@ class PlayerInputProcessor(esper.Processor):
 
                         changed_selected_turret = True
 
+                case {
+                    "kind": PlayerActionKind.SetTurretTargetPriority,
+                    "target_priority": target_priority,
+                }:
+                    turret_machine = self.world.component_for_entity(
+                        player_input_machine.selected_turret, TurretMachine
+                    )
+
+                    turret_machine.target_priority = target_priority
+
+                    changed_selected_turret = True
+
                 case {"kind": PlayerActionKind.SellTurret}:
                     sell_turret(
                         self.world, player_input_machine.selected_turret, assets=assets
@@ -541,6 +824,10 @@ class PlayerInputProcessor(esper.Processor):
                     changed_turret_to_build = True
                     changed_selected_turret = True
 
+        # headless worlds have no gui to sync
+        if gui_elements is None:
+            return
+
         if changed_turret_to_build:
             sync_turret_build_buttons_ui(self.world, player, gui_elements)
 
@@ -579,68 +866,73 @@ class LifetimeProcessor(esper.Processor):
 
 
 class PathingProcessor(esper.Processor):
+    def __init__(self, moving_bodies: MovingBodies) -> None:
+        super().__init__()
+
+        self.moving_bodies = moving_bodies
+
     def process(self, *args, **kwargs):
-        for ent, (pathing, bbox, vel) in self.world.get_components(
-            UnitPathing, BoundingBox, Velocity
-        ):
-            # check if unit has reached the target
-            target_vertex = pathing.current_target
+        self.moving_bodies.steer()
 
-            if bbox.rect.collidepoint(target_vertex):
-                pathing.advance()
 
-            # update velocity
-            target_vertex = pathing.current_target
+class DespawningProcessor(esper.Processor):
+    def process(
+        self, *args, delta: float, gui_elements: GuiElements | None = None, **kwargs
+    ):
+        enemy_collisions = self.world.get_component(EnemyCollisions)[0][1]
 
-            vec = (target_vertex - Vector2(*bbox.rect.center)).normalize()
+        for despawned_ents in enemy_collisions.despawning.values():
+            for ent in despawned_ents:
+                logger.info("Despawning entity id=%d", ent)
 
-            vec.scale_to_length(vel.vec.magnitude())
+                track_score_event(self.world, ScoreEventKind.EnemyDespawn)
 
-            vel.vec = vec
+                self.world.delete_entity(ent)
 
-            # orient towards the next vertex
-            bbox.rotation = vec
+                # game over
+                set_game_over(self.world, gui_elements)
 
 
-class DespawningProcessor(esper.Processor):
-    def process(self, *args, delta: float, gui_elements: GuiElements, **kwargs):
-        # TODO clean this up
-        # could be more efficient than N^2
-        # would be cool to have intersection done once per frame
-        for _, (despawning, despawn_bbox) in self.world.get_components(
-            Despawning, BoundingBox
-        ):
-            for ent, (despawnable, ent_bbox) in self.world.get_components(
-                Despawnable, BoundingBox
-            ):
-                if despawn_bbox.rect.colliderect(ent_bbox.rect):
-                    logger.info("Despawning entity id=%d", ent)
+class BoundingBoxRotationProcessor(esper.Processor):
+    """
+    Resizes bounding boxes to fit their rotated sprite, as part of the game
+    logic since sprite sizes drive collisions; the images themselves are
+    only rotated by RotationProcessor when rendering
+    """
 
-                    track_score_event(self.world, ScoreEventKind.EnemyDespawn)
+    def process(self, *args, **kwargs):
+        for _, (renderable, bbox) in self.world.get_components(Renderable, BoundingBox):
+            width, height = renderable.original_image.get_size()
+            angle = rotation_angle(bbox.rotation)
 
-                    self.world.delete_entity(ent)
+            # mirrors the output size of pygame.transform.rotate
+            if angle % 90 == 0:
+                if angle % 180 != 0:
+                    width, height = height, width
+            else:
+                radians = math.radians(angle)
+                cos, sin = abs(math.cos(radians)), abs(math.sin(radians))
 
-                    # game over
-                    set_game_over(self.world, gui_elements)
+                width, height = (
+                    int(cos * width + sin * height),
+                    int(sin * width + cos * height),
+                )
+
+            center = bbox.rect.center
+
+            bbox.rect = Rect(0, 0, width, height)
+            bbox.rect.center = center
 
 
 class RotationProcessor(esper.Processor):
     # TODO need to combine with rendering somehow
     def process(self, *args, **kwargs):
         for _, (renderable, bbox) in self.world.get_components(Renderable, BoundingBox):
-            # sync the bbox and rotation
-
-            renderable.image = pygame.transform.rotate(
-                renderable.original_image, bbox.rotation.angle_to(Vector2())
+            # bbox is already sized to the rotated image by the logic tick
+            renderable.image = rotate_image(
+                renderable.original_image, rotation_angle(bbox.rotation)
             )
 
-            updated_rect = renderable.image.get_rect()
-
-            # around what point is rotation performed?
-            updated_rect.center = bbox.rect.center
-
-            bbox.rect = updated_rect
-
 
 class AnimationProcessor(esper.Processor):
     # TODO need to combine with rendering somehow
@@ -658,18 +950,65 @@ class AnimationProcessor(esper.Processor):
                 renderable.original_image = renderable.image = animated.current_frame
 
 
+class EnemySpatialIndexProcessor(esper.Processor):
+    def __init__(self, enemy_targets: EnemyTargets) -> None:
+        super().__init__()
+
+        self.enemy_targets = enemy_targets
+
+    def process(self, *args, **kwargs):
+        enemy_targets = self.enemy_targets
+        enemy_targets.update()
+
+        for _, enemy_spatial_index in self.world.get_component(EnemySpatialIndex):
+            # copied, enemies dying later this tick swap slots around
+            enemy_spatial_index.entities = list(enemy_targets.entities)
+            enemy_spatial_index.grid = enemy_targets.grid
+
+
+class TurretTargetingProcessor(esper.Processor):
+    def __init__(self, enemy_targets: EnemyTargets) -> None:
+        super().__init__()
+
+        self.enemy_targets = enemy_targets
+
+    def process(self, *args, **kwargs):
+        turrets = self.world.get_components(TurretMachine, BoundingBox, TurretTarget)
+
+        if not turrets:
+            return
+
+        # enemies haven't moved since the spatial index, only their health
+        # and who's still around may have changed
+        self.enemy_targets.update(moved=False)
+
+        # every turret at once, against the enemies in the grid cells around it
+        targets = select_targets(
+            self.enemy_targets,
+            np.array(
+                [bbox.rect.center for _, (_, bbox, _) in turrets], dtype=float
+            ).reshape(-1, 2),
+            np.array([turret_machine.range for _, (turret_machine, _, _) in turrets]),
+            [turret_machine.target_priority for _, (turret_machine, _, _) in turrets],
+        )
+
+        for (_, (_, _, turret_target)), enemy_ent in zip(turrets, targets):
+            turret_target.enemy = enemy_ent
+
+
 class TurretStateProcessor(esper.Processor):
     def process(self, *args, delta, assets: Assets, **kwargs):
         for turret_ent, (
             turret_machine,
             turret_bbox,
             renderable,
-        ) in self.world.get_components(TurretMachine, BoundingBox, Renderable):
+            turret_target,
+        ) in self.world.get_components(
+            TurretMachine, BoundingBox, Renderable, TurretTarget
+        ):
             turret_machine.elapsed += delta
 
-            closest_enemy = get_closest_enemy(
-                self.world, turret_bbox, range=turret_machine.range
-            )
+            closest_enemy = turret_target.enemy
 
             match turret_machine.state:
                 case TurretState.Idle:
@@ -879,21 +1218,9 @@ class EnemyStatusVisualEffectProcessor(esper.Processor):
                 RenderableExtraKind.HealthBar
             ]
 
-            health_bar_height = 4
-            health_bar_full_width = 32
-            health_bar_image = pygame.Surface(
-                (health_bar_full_width, health_bar_height), pygame.SRCALPHA
-            )
-
-            health_bar_filled_width = int(
-                health_bar_full_width * enemy.health_ratio / 100.0
+            health_bar_image = render_health_bar(
+                int(HEALTH_BAR_WIDTH * enemy.health_ratio / 100.0)
             )
-            health_bar_filled = pygame.Surface(
-                (health_bar_filled_width, health_bar_height)
-            )
-            health_bar_filled.fill(("#ff0006"))
-
-            health_bar_image.blit(health_bar_filled, (0, 0))
 
             ## positioned on top of enemy with margin
             health_bar_rect = health_bar_image.get_rect()
@@ -909,22 +1236,24 @@ class EnemyStatusVisualEffectProcessor(esper.Processor):
                 RenderableExtraKind.StatusEffectBar
             ]
 
-            status_effect_image = pygame.Surface((80, 14), pygame.SRCALPHA)
+            status_effect_icons = []
 
             if self.world.has_component(enemy_ent, Burning):
-                status_effect_image.blit(assets.burning_status_effect, (0, 0))
+                status_effect_icons.append((assets.burning_status_effect, 0))
 
             if self.world.has_component(enemy_ent, Poisoned):
-                status_effect_image.blit(assets.poisoned_status_effect, (14, 0))
+                status_effect_icons.append((assets.poisoned_status_effect, 14))
 
             # TODO
             # if self.world.has_component(enemy_ent, Slowed):
-            #     status_effect_image.blit(assets.slowed_status_effect, (0, 0))
+            #     status_effect_icons.append((assets.slowed_status_effect, 0))
+
+            status_effect_image = render_status_effect_bar(tuple(status_effect_icons))
 
             ## positioned on top of enemy, with margin
             status_effect_rect = status_effect_image.get_rect()
             status_effect_rect.bottomleft = bbox.rect.topleft
-            status_effect_rect.top -= 12 + health_bar_height
+            status_effect_rect.top -= 12 + HEALTH_BAR_HEIGHT
 
             status_effect_extra_renderable.image = status_effect_image
             status_effect_extra_renderable.order = RenderableExtraOrder.Over
@@ -932,9 +1261,7 @@ class EnemyStatusVisualEffectProcessor(esper.Processor):
 
 
 class ResearchProcessor(esper.Processor):
-    def process(
-        self, *args, gui_elements: GuiElements, player: int, delta: float, **kwargs
-    ):
+    def process(self, *args, player: int, delta: float, **kwargs):
         player_research = self.world.component_for_entity(player, PlayerResearch)
 
         if player_research.research_in_progress is not None:
@@ -945,4 +1272,7 @@ class ResearchProcessor(esper.Processor):
 
                 player_research.reset_in_progress()
 
+
+class ResearchGuiProcessor(esper.Processor):
+    def process(self, *args, gui_elements: GuiElements, player: int, **kwargs):
         sync_research_gui(self.world, player, gui_elements)
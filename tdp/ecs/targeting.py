@@ -0,0 +1,219 @@
+import logging
+from typing import Callable
+
+import numpy as np
+
+from .components import BoundingBox, Enemy, UnitPathing
+from .enums import TurretTargetPriority
+from .spatial import SpatialHashGrid, best_in_range
+
+from . import esper
+
+logger = logging.getLogger(__name__)
+
+
+class EnemyTargets:
+    """
+    Enemies that can be targeted, as arrays indexed by slot and shared by
+    every turret, kept up to date as enemies spawn and die. Removing an
+    enemy swaps the last slot into its place, so slots stay contiguous,
+    and slots are put back in entity order before the arrays are next
+    used. That way ties between enemies, and the order of the grid's
+    points within a cell, don't depend on the order enemies came and went
+    in, which a game restored from a snapshot doesn't repeat.
+
+    Positions and the grid over them, which lets each turret only measure
+    the enemies around it, are refreshed once enemies have moved, or when
+    enemies have come and gone since. Health is refreshed whenever
+    targets are picked.
+    """
+
+    def __init__(self, world: esper.World, capacity: int = 64) -> None:
+        self.world = world
+
+        self.entities: list[int] = []
+        self.slots: dict[int, int] = {}
+
+        self.enemies: list[Enemy] = []
+        self.bboxes: list[BoundingBox] = []
+        self.pathings: list[UnitPathing | None] = []
+
+        self.max_health = np.zeros(capacity)
+
+        self.position = np.zeros((0, 2))
+        self.health = np.zeros(0)
+        # how far enemies are from the end of their route, routes differ in
+        # length so this is what tells who's ahead
+        self.path_remaining = np.zeros(0)
+
+        self.grid = SpatialHashGrid()
+
+        # whether enemies came or went since the grid was built
+        self.changed = False
+
+        for ent, enemy in world.get_component(Enemy):
+            self.add(ent, enemy)
+
+        world.set_component_handler(Enemy, self.add, self.remove)
+        world.set_component_handler(BoundingBox, self.add, self.remove)
+
+    def __len__(self) -> int:
+        return len(self.entities)
+
+    def add(self, ent: int, component: Enemy | BoundingBox):
+        if ent in self.slots:
+            return
+
+        enemy = self.world.try_component(ent, Enemy)
+        bbox = self.world.try_component(ent, BoundingBox)
+
+        if enemy is None or bbox is None:
+            return
+
+        slot = len(self.entities)
+
+        if slot == len(self.max_health):
+            self.max_health = np.append(self.max_health, np.zeros(slot))
+
+        self.slots[ent] = slot
+        self.entities.append(ent)
+        self.enemies.append(enemy)
+        self.bboxes.append(bbox)
+        self.pathings.append(self.world.try_component(ent, UnitPathing))
+
+        self.max_health[slot] = enemy.max_health
+
+        self.changed = True
+
+    def remove(self, ent: int, component: Enemy | BoundingBox):
+        if (slot := self.slots.pop(ent, None)) is None:
+            return
+
+        last = len(self.entities) - 1
+
+        if slot != last:
+            last_ent = self.entities[last]
+
+            self.slots[last_ent] = slot
+            self.entities[slot] = last_ent
+            self.enemies[slot] = self.enemies[last]
+            self.bboxes[slot] = self.bboxes[last]
+            self.pathings[slot] = self.pathings[last]
+
+            self.max_health[slot] = self.max_health[last]
+
+        self.entities.pop()
+        self.enemies.pop()
+        self.bboxes.pop()
+        self.pathings.pop()
+
+        self.changed = True
+
+    def _sort(self):
+        order = sorted(range(len(self.entities)), key=self.entities.__getitem__)
+
+        self.entities = [self.entities[slot] for slot in order]
+        self.enemies = [self.enemies[slot] for slot in order]
+        self.bboxes = [self.bboxes[slot] for slot in order]
+        self.pathings = [self.pathings[slot] for slot in order]
+
+        self.max_health[: len(order)] = self.max_health[order]
+
+        self.slots = {ent: slot for slot, ent in enumerate(self.entities)}
+
+    def update(self, *, moved: bool = True):
+        if self.changed:
+            self._sort()
+
+        if moved or self.changed:
+            self.position = np.array(
+                [bbox.rect.center for bbox in self.bboxes], dtype=float
+            ).reshape(-1, 2)
+            self.path_remaining = np.array(
+                [
+                    np.inf if pathing is None else pathing.remaining
+                    for pathing in self.pathings
+                ],
+                dtype=float,
+            )
+
+            # built anew rather than in place, the spatial index holds on
+            # to the previous one until it next updates
+            self.grid = SpatialHashGrid()
+            self.grid.build(self.position)
+
+            self.changed = False
+
+        self.health = np.array([enemy.health for enemy in self.enemies], dtype=float)
+
+
+def score_closest(
+    enemies: EnemyTargets, index: np.ndarray, distance_sq: np.ndarray
+) -> np.ndarray:
+    # ties go to the closest anyway
+    return np.zeros_like(distance_sq)
+
+
+def score_furthest(
+    enemies: EnemyTargets, index: np.ndarray, distance_sq: np.ndarray
+) -> np.ndarray:
+    return -distance_sq
+
+
+def score_lowest_health(
+    enemies: EnemyTargets, index: np.ndarray, distance_sq: np.ndarray
+) -> np.ndarray:
+    return enemies.health[index]
+
+
+def score_highest_max_health(
+    enemies: EnemyTargets, index: np.ndarray, distance_sq: np.ndarray
+) -> np.ndarray:
+    return -enemies.max_health[index]
+
+
+def score_first_along_path(
+    enemies: EnemyTargets, index: np.ndarray, distance_sq: np.ndarray
+) -> np.ndarray:
+    return enemies.path_remaining[index]
+
+
+# scores the enemies in range of a set of turrets, given by index with their
+# squared distances; each turret targets the lowest scoring enemy in its
+# range, ties going to the closest
+TargetScore = Callable[[EnemyTargets, np.ndarray, np.ndarray], np.ndarray]
+
+TARGET_PRIORITY_SCORES: dict[TurretTargetPriority, TargetScore] = {
+    TurretTargetPriority.Closest: score_closest,
+    TurretTargetPriority.Furthest: score_furthest,
+    TurretTargetPriority.LowestHealth: score_lowest_health,
+    TurretTargetPriority.HighestMaxHealth: score_highest_max_health,
+    TurretTargetPriority.FirstAlongPath: score_first_along_path,
+}
+
+
+def select_targets(
+    enemies: EnemyTargets,
+    sources: np.ndarray,
+    radii: np.ndarray,
+    priorities: list[TurretTargetPriority],
+) -> list[int | None]:
+    """
+    Target of each turret by its priority, from the turret and enemy pairs
+    in range found on the grid, with turrets of the same priority scored
+    together
+    """
+    turret_index, enemy_index, distance_sq = enemies.grid.pairs_in_range(sources, radii)
+    scores = np.zeros_like(distance_sq)
+
+    for priority in set(priorities):
+        (turrets,) = np.nonzero([p == priority for p in priorities])
+        pairs = np.isin(turret_index, turrets)
+
+        scores[pairs] = TARGET_PRIORITY_SCORES[priority](
+            enemies, enemy_index[pairs], distance_sq[pairs]
+        )
+
+    best = best_in_range(len(sources), turret_index, enemy_index, distance_sq, scores)
+
+    return [enemies.entities[index] if index >= 0 else None for index in best.tolist()]
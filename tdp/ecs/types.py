@@ -6,6 +6,7 @@ from .enums import (
     ResearchKind,
     SpawningWaveStepKind,
     TurretKind,
+    TurretTargetPriority,
     TurretUpgradeablePropertyKind,
 )
 
@@ -17,6 +18,7 @@ class PlayerAction(TypedDict):
     turret_kind: NotRequired[TurretKind]
     turret_property: NotRequired[TurretUpgradeablePropertyKind]
     research_kind: NotRequired[ResearchKind]
+    target_priority: NotRequired[TurretTargetPriority]
 
 
 class SpawningWaveStep(TypedDict):
@@ -1,21 +1,21 @@
 import logging
-
-from pygame.math import Vector2
+import random
 
 from tdp.ecs.gui import GuiElements
 
 from .components import (
     BoundingBox,
-    PathGraph,
+    EnemySpatialIndex,
+    PlayerInputMachine,
+    SimulationRandom,
     TurretBuildZone,
-    Enemy,
     TurretMachine,
-    UnitPathing,
 )
 from .types import PlayerAction
 from .enums import (
     PlayerActionKind,
     ResearchKind,
+    TurretTargetPriority,
     enabled_turret_kinds,
     TurretUpgradeablePropertyKind,
 )
@@ -25,6 +25,10 @@ from . import esper
 logger = logging.getLogger(__name__)
 
 
+def get_simulation_random(world: esper.World) -> random.Random:
+    return world.get_component(SimulationRandom)[0][1].rng
+
+
 def get_player_action_for_click(world: esper.World, pos) -> PlayerAction | None:
     # for now, just look for selecting turret build zones
     for ent, (bbox, bz) in world.get_components(BoundingBox, TurretBuildZone):
@@ -65,6 +69,11 @@ def get_player_action_for_button_press(
             }
 
     match ui_element:
+        case gui_elements.selected_turret_target_priority_button:
+            return {
+                "kind": PlayerActionKind.SetTurretTargetPriority,
+                "target_priority": next_turret_target_priority(world),
+            }
         case gui_elements.selected_turret_sell_button:
             return {
                 "kind": PlayerActionKind.SellTurret,
@@ -79,35 +88,21 @@ def get_player_action_for_button_press(
             }
 
 
-def get_closest_enemy(
-    world: esper.World,
-    src_bbox: BoundingBox,
-    *,
-    range: float,
-    exclude: list[int] = None,
-) -> int | None:
-    exclude = exclude or []
-
-    ## find closest enemy
-    closest_enemy = None
-    closest_enemy_distance = float("inf")
-
-    for enemy_ent, (
-        _enemy,
-        other_bbox,
-    ) in world.get_components(Enemy, BoundingBox):
-        if enemy_ent in exclude:
-            continue
+def next_turret_target_priority(world: esper.World) -> TurretTargetPriority:
+    """
+    The priority after the selected turret's, cycling through them all
+    """
+    player_input_machine = world.get_component(PlayerInputMachine)[0][1]
 
-        distance_to_enemy = Vector2(other_bbox.rect.center).distance_to(
-            Vector2(src_bbox.rect.center)
-        )
+    turret_machine = world.component_for_entity(
+        player_input_machine.selected_turret, TurretMachine
+    )
 
-        if distance_to_enemy <= range and distance_to_enemy < closest_enemy_distance:
-            closest_enemy_distance = distance_to_enemy
-            closest_enemy = enemy_ent
+    priorities = list(TurretTargetPriority)
 
-    return closest_enemy
+    return priorities[
+        (priorities.index(turret_machine.target_priority) + 1) % len(priorities)
+    ]
 
 
 def get_enemies_in_range(
@@ -115,34 +110,18 @@ def get_enemies_in_range(
     src_bbox: BoundingBox,
     *,
     range: float,
-    exclude: list[int] = None,
+    exclude: list[int] | None = None,
 ) -> list[int]:
-    exclude = exclude or []
-
-    ents_in_range = []
-
-    for enemy_ent, (
-        _enemy,
-        other_bbox,
-    ) in world.get_components(Enemy, BoundingBox):
-        if enemy_ent in exclude:
-            continue
-
-        distance_to_enemy = Vector2(other_bbox.rect.center).distance_to(
-            Vector2(src_bbox.rect.center)
-        )
+    enemy_spatial_index = world.get_component(EnemySpatialIndex)[0][1]
 
-        if distance_to_enemy <= range:
-            ents_in_range.append(enemy_ent)
+    enemies_in_range = [
+        enemy_spatial_index.entities[index]
+        for index in enemy_spatial_index.grid.query_radius(
+            src_bbox.rect.center, range
+        ).tolist()
+    ]
 
-    return ents_in_range
+    if exclude:
+        return [ent for ent in enemies_in_range if ent not in exclude]
 
-
-def unit_pathing_to_path_graph(unit_pathing: UnitPathing) -> PathGraph:
-    """
-    for dynamic spawns, copy the remaining points on the path
-    """
-
-    return PathGraph(
-        vertices=[vert.copy() for vert in unit_pathing.vertices[unit_pathing.index :]]
-    )
+    return enemies_in_range
@@ -22,7 +22,7 @@ MEDIUM_WAIT = SHORT_WAIT * 2.5
 LONG_WAIT = SHORT_WAIT * 5.0
 
 
-def generate_random_waves(count=99) -> list[SpawningWave]:
+def generate_random_waves(rng: random.Random, count=99) -> list[SpawningWave]:
     waves = []
     wave_type_length = 7
 
@@ -68,7 +68,7 @@ def generate_random_waves(count=99) -> list[SpawningWave]:
             enemies = ["T", "P"]
             weights = [2, 1]
 
-        enemies = random.choices(enemies, weights=weights, k=enemies_count)
+        enemies = rng.choices(enemies, weights=weights, k=enemies_count)
 
         wave_conf = "L" + default_wait.join(enemies) + "LLLLL"
 
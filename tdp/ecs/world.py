@@ -1,16 +1,47 @@
+import random
+
 from . import esper
 
+from .components import EnemyCollisions, EnemySpatialIndex, SimulationRandom
 from .map import load_map
+from .profiling import Profiler
 from .systems import add_systems
 
 
-def build_world(map_name: str) -> esper.World:
-    world = esper.World()
+def create_world(
+    *, headless: bool = False, profiler: Profiler | None = None
+) -> esper.World:
+    """
+    A world with its systems but without any entities yet
+    """
+    world = esper.World(timed=profiler is not None)
+
+    if profiler is not None:
+        profiler.attach(world)
+
+    add_systems(world, headless=headless)
+
+    return world
+
 
-    # initialize systems
-    add_systems(world)
+def build_world(
+    map_name: str,
+    *,
+    seed: int | None = None,
+    headless: bool = False,
+    profiler: Profiler | None = None,
+) -> esper.World:
+    world = create_world(headless=headless, profiler=profiler)
+
+    # needed before loading the map, which generates the waves
+    world.create_entity(
+        SimulationRandom(seed=random.randrange(2**32) if seed is None else seed)
+    )
 
     # add entities
-    load_map(world, map_name)
+    load_map(world, map_name, headless=headless)
+
+    world.create_entity(EnemySpatialIndex())
+    world.create_entity(EnemyCollisions())
 
     return world
@@ -1,14 +1,24 @@
+import pathlib
+
 import pygame
 import pygame_gui
 
 from tdp.constants import SCREEN_HEIGHT, SCREEN_WIDTH
+from tdp.ecs.enums import GameSpeed
+from tdp.ecs.replay import Replay
 
 from tdp.scenes.enums import SceneKind, SceneEventKind
 from tdp.scenes import GameScene, MainScene, Scene
 
 
 def start_app(
-    initial_scene_kind: SceneKind = SceneKind.Main, initial_map: str = "map1"
+    initial_scene_kind: SceneKind = SceneKind.Main,
+    initial_map: str = "map1",
+    *,
+    profile: bool = False,
+    replay: Replay | None = None,
+    game_speed: GameSpeed = GameSpeed.Normal,
+    snapshot_path: pathlib.Path | None = None,
 ):
     #####
     # setup pygame
@@ -33,7 +43,15 @@ def start_app(
     starting_scene = scenes_map[initial_scene_kind]
 
     current_scene: Scene = starting_scene(
-        screen=screen, gui_manager=gui_manager, clock=clock, map_name=initial_map
+        screen=screen,
+        gui_manager=gui_manager,
+        clock=clock,
+        map_name=initial_map,
+        profile=profile,
+        # only the first game plays back the replay
+        replay=replay,
+        game_speed=game_speed,
+        snapshot_path=snapshot_path,
     )
 
     running = True
@@ -42,6 +60,8 @@ def start_app(
         # run() can return transitions or exit the game
         match current_scene.run():
             case {"kind": SceneEventKind.Quit}:
+                current_scene.cleanup()
+
                 running = False
             case {
                 "kind": SceneEventKind.ChangeScene,
@@ -55,6 +75,7 @@ def start_app(
                     gui_manager=gui_manager,
                     clock=clock,
                     map_name=next_map,
+                    profile=profile,
                 )
             case {
                 "kind": SceneEventKind.ChangeScene,
@@ -66,6 +87,7 @@ def start_app(
                     screen=screen,
                     gui_manager=gui_manager,
                     clock=clock,
+                    profile=profile,
                 )
             case _:
                 pass
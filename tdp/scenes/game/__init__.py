@@ -1,12 +1,36 @@
+import datetime
+import pathlib
+import time
+
 import pygame
 import pygame_gui
 
-from tdp.constants import PygameCustomEventType
+from tdp.constants import (
+    FIXED_TICK_DELTA,
+    FRAMERATE,
+    LOGIC_TIME_BUDGET,
+    MAX_FRAME_DELTA,
+    PROFILE_DUMP_DIR,
+    REPLAY_DIR,
+    SAVE_DIR,
+    PygameCustomEventType,
+)
 from tdp.ecs.assets import load_assets
 from tdp.ecs.entities import create_player
-from tdp.ecs.enums import InputEventKind
-from tdp.ecs.gui import build_gui, cleanup_gui
+from tdp.ecs.components import PlayerInputMachine
+from tdp.ecs.enums import GameSpeed, InputEventKind, PlayerInputState, ProcessorGroup
+from tdp.ecs.gui import (
+    build_gui,
+    cleanup_gui,
+    sync_game_speed_gui,
+    sync_selected_turret_gui,
+)
+from tdp.ecs.profiling import Profiler
+from tdp.ecs.recording import InputRecorder
+from tdp.ecs.replay import build_replay, check_replay_stats_repo, save_replay
+from tdp.ecs.snapshot import load_snapshot, save_snapshot
 from tdp.ecs.statsrepo import load_stats_repo
+from tdp.ecs.systems import set_game_over
 from tdp.ecs.world import build_world
 from tdp.scenes.enums import SceneEventKind, SceneKind
 
@@ -23,28 +47,124 @@ class GameScene(Scene):
     ) -> None:
         self.map_name = kwargs.get("map_name")
 
+        # more than one logic tick runs per frame when sped up, rendering
+        # and gui syncing still only happen once per frame
+        self.game_speed = kwargs.get("game_speed", GameSpeed.Normal)
+
+        # processor timings, shown over the map and dumped on exit
+        self.profiler = Profiler() if kwargs.get("profile") else None
+
+        # with the world's seed, reproduces the game
+        self.seed = kwargs.get("seed")
+        self.input_recorder = InputRecorder()
+
+        # plays back recorded actions instead of the player's, who takes over
+        # once the replay runs out
+        self.replay = kwargs.get("replay")
+
+        if self.replay is not None:
+            self.map_name = self.replay.map_name
+            self.seed = self.replay.seed
+
+        # continues a saved game instead of starting the map over
+        self.snapshot_path = kwargs.get("snapshot_path")
+
         super().__init__(screen, gui_manager, clock, **kwargs)
 
     def setup(self):
         self.stats_repo = load_stats_repo()
         self.gui_elements = build_gui(self.gui_manager, self.stats_repo)
+        sync_game_speed_gui(self.game_speed, self.gui_elements)
         self.assets = load_assets()
-        self.world = build_world(self.map_name)
+
+        if self.snapshot_path is not None:
+            self.restore_snapshot(self.snapshot_path)
+            return
+
+        self.world = build_world(self.map_name, seed=self.seed, profiler=self.profiler)
         self.player = create_player(self.world)
 
+        if self.replay is not None:
+            check_replay_stats_repo(self.replay, self.stats_repo)
+
+    @property
+    def quicksave_path(self) -> pathlib.Path:
+        return pathlib.Path(SAVE_DIR) / f"{self.map_name}.snapshot"
+
+    def save_snapshot(self, path: pathlib.Path):
+        save_snapshot(
+            path,
+            self.world,
+            map_name=self.map_name,
+            assets=self.assets,
+            ticks=self.input_recorder.tick,
+            input_recorder=self.input_recorder,
+        )
+
+    def restore_snapshot(self, path: pathlib.Path):
+        snapshot = load_snapshot(path, assets=self.assets, profiler=self.profiler)
+
+        self.map_name = snapshot.map_name
+        self.world = snapshot.world
+        self.player = snapshot.player
+        self.input_recorder = snapshot.input_recorder or InputRecorder(
+            tick=snapshot.ticks
+        )
+
+        # the gui is only synced as the world changes, so start it over
+        cleanup_gui(self.gui_elements)
+
+        self.gui_elements = build_gui(self.gui_manager, self.stats_repo)
+        sync_game_speed_gui(self.game_speed, self.gui_elements)
+
+        player_input_machine = self.world.component_for_entity(
+            self.player, PlayerInputMachine
+        )
+
+        if player_input_machine.state == PlayerInputState.GameOver:
+            set_game_over(self.world, self.gui_elements)
+        elif player_input_machine.selected_turret is not None:
+            sync_selected_turret_gui(
+                self.world, player_input_machine.selected_turret, self.gui_elements
+            )
+
+            self.gui_elements.selected_turret_panel.show()
+
+    def cycle_game_speed(self):
+        speeds = list(GameSpeed)
+
+        self.game_speed = speeds[(speeds.index(self.game_speed) + 1) % len(speeds)]
+
+        sync_game_speed_gui(self.game_speed, self.gui_elements)
+
     def run(self):
         running = True
 
-        while running:
-            time_delta = self.clock.tick(30)
+        # real time not yet simulated, carried over between frames
+        accumulator = 0.0
 
-            input_events = []
+        # input is handed to the next logic tick, which may be a few frames
+        # away when rendering faster than the tick rate
+        input_events = []
+
+        while running:
+            time_delta = self.clock.tick(FRAMERATE)
 
             for event in pygame.event.get():
                 match event.type:
                     case pygame.QUIT:
                         running = False
                     case pygame.KEYDOWN:
+                        match event.key:
+                            case pygame.K_F5:
+                                self.save_snapshot(self.quicksave_path)
+                            case pygame.K_F9 if self.quicksave_path.exists():
+                                self.restore_snapshot(self.quicksave_path)
+
+                                # meant for the world that was replaced
+                                input_events = []
+                                continue
+
                         input_events.append(
                             {"kind": InputEventKind.KeyDown, "key": event.key}
                         )
@@ -61,6 +181,9 @@ class GameScene(Scene):
                                 }
                             )
                     case pygame_gui.UI_BUTTON_PRESSED:
+                        if event.ui_element == self.gui_elements.game_speed_button:
+                            self.cycle_game_speed()
+
                         input_events.append(
                             {
                                 "kind": InputEventKind.UIButtonPress,
@@ -77,21 +200,91 @@ class GameScene(Scene):
 
             self.gui_manager.update(time_delta / 1000.0)
 
-            self.world.process(
-                delta=time_delta,
+            if self.game_speed == GameSpeed.Max:
+                # keep ticking until the budget runs out
+                accumulator = FIXED_TICK_DELTA
+            else:
+                accumulator += min(time_delta, MAX_FRAME_DELTA) * self.game_speed
+
+            ticks = 0
+            logic_deadline = time.perf_counter() + LOGIC_TIME_BUDGET / 1000.0
+
+            while accumulator >= FIXED_TICK_DELTA:
+                replaying = (
+                    self.replay is not None
+                    and self.input_recorder.tick < self.replay.ticks
+                )
+
+                self.world.process_group(
+                    ProcessorGroup.Logic,
+                    delta=FIXED_TICK_DELTA,
+                    assets=self.assets,
+                    player_input_events=[] if replaying else input_events,
+                    scripted_player_actions=(
+                        self.replay.actions.get(self.input_recorder.tick)
+                        if replaying
+                        else None
+                    ),
+                    input_recorder=self.input_recorder,
+                    gui_elements=self.gui_elements,
+                    player=self.player,
+                    stats_repo=self.stats_repo,
+                )
+
+                input_events = []
+                ticks += 1
+
+                if self.game_speed != GameSpeed.Max:
+                    accumulator -= FIXED_TICK_DELTA
+
+                if time.perf_counter() >= logic_deadline:
+                    # out of time, drop whatever backlog is left instead of
+                    # falling further behind every frame
+                    accumulator %= FIXED_TICK_DELTA
+                    break
+
+            self.world.process_group(
+                ProcessorGroup.Render,
+                # simulated time covered by this frame, for animations
+                delta=ticks * FIXED_TICK_DELTA,
+                # how far between the last tick and the next one to draw
+                alpha=(
+                    1.0
+                    if self.game_speed == GameSpeed.Max
+                    else accumulator / FIXED_TICK_DELTA
+                ),
                 clock=self.clock,
                 screen=self.screen,
                 gui_manager=self.gui_manager,
                 assets=self.assets,
                 show_fps=True,
-                player_input_events=input_events,
                 gui_elements=self.gui_elements,
                 debug=False,
                 player=self.player,
                 stats_repo=self.stats_repo,
+                profiler=self.profiler,
             )
 
+            if self.profiler is not None:
+                self.profiler.end_frame(self.world)
+
         return {"kind": SceneEventKind.Quit}
 
     def cleanup(self):
         cleanup_gui(self.gui_elements)
+
+        timestamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+
+        save_replay(
+            build_replay(
+                self.world, self.map_name, self.input_recorder, self.stats_repo
+            ),
+            pathlib.Path(REPLAY_DIR) / f"{self.map_name}-{timestamp}.json.gz",
+        )
+
+        if self.profiler is not None:
+            for suffix in (".csv", ".json"):
+                self.profiler.dump(
+                    pathlib.Path(PROFILE_DUMP_DIR)
+                    / f"{self.map_name}-{timestamp}{suffix}"
+                )